@@ -7,9 +7,13 @@ TranslationAgent —— 论文翻译（中英互译）
 自动检测语言，保留学术术语，提供术语对照表。
 """
 
+import re
 from typing import Dict
 from server.agent.base import AgentBase, AgentContext
 
+_QUOTED_RE = re.compile(r'["""](.*?)["""]', re.DOTALL)
+_TRANSLATE_PREFIX_RE = re.compile(r'^(请?翻译|translate|帮我翻译)[：:，,\s]*', re.IGNORECASE)
+
 
 class TranslationAgent(AgentBase):
     name = "translation_agent"
@@ -51,12 +55,8 @@ class TranslationAgent(AgentBase):
 
     def _extract_text(self, focus: str, user_input: str) -> str:
         """从用户输入中提取待翻译的文本。"""
-        import re
-        quoted = re.findall(r'["""](.*?)["""]', user_input, re.DOTALL)
+        quoted = _QUOTED_RE.findall(user_input)
         if quoted:
             return "\n".join(quoted)
-        cleaned = re.sub(
-            r'^(请?翻译|translate|帮我翻译)[：:，,\s]*', '',
-            user_input, flags=re.IGNORECASE
-        ).strip()
+        cleaned = _TRANSLATE_PREFIX_RE.sub('', user_input).strip()
         return cleaned or focus
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import pathlib
 import yaml
 from typing import Optional
@@ -10,6 +11,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 _CONFIG_PATH = pathlib.Path(__file__).parent.parent.parent / "server" / "config" / "model_config.yaml"
+_ENV_VAR_RE = re.compile(r"\$\{(\w+)\}")
 
 
 def _load_config() -> dict:
@@ -17,10 +19,9 @@ def _load_config() -> dict:
         raw = yaml.safe_load(f)
 
     # 展开环境变量占位符 ${VAR}
-    import re
     def expand(val):
         if isinstance(val, str):
-            return re.sub(r"\$\{(\w+)\}", lambda m: os.environ.get(m.group(1), ""), val)
+            return _ENV_VAR_RE.sub(lambda m: os.environ.get(m.group(1), ""), val)
         return val
 
     def walk(obj):
@@ -1,15 +1,73 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import asyncio
 import pathlib
 import datetime
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any, Set, Tuple
 import chromadb
 from chromadb.config import Settings
+from server.utils.executors import get_io_pool
 from server.utils.logger import logger
 
 DEFAULT_CHROMA_PATH = pathlib.Path(__file__).parent.parent.parent.parent / "data" / "chroma_db"
 
+WRITE_BATCH_MAX = 1000   # 合并写入时单次 upsert 的最大条数
+WRITE_BATCH_WAIT = 0.05  # 合并写入最多等待的秒数
+
+
+class _UpsertBatcher:
+    """
+    进程内写入合并：多个解析任务同时写库时，把各自的批次合并为一次 upsert。
+    攒满 max_batch 条立即写入，否则最多等待 max_wait 秒；提交方在写入完成后返回。
+    """
+
+    def __init__(self, upsert_fn: Callable[[List[Dict]], None],
+                 max_batch: int = WRITE_BATCH_MAX, max_wait: float = WRITE_BATCH_WAIT):
+        self._upsert_fn = upsert_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[List[Dict], asyncio.Future]] = []
+        self._pending_count = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()  # 持有引用，防止写入任务被 GC
+
+    async def submit(self, records: List[Dict]) -> None:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((records, fut))
+        self._pending_count += len(records)
+        if self._pending_count >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_count = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[List[Dict], asyncio.Future]]) -> None:
+        # 同一 id 只保留最后一次写入，ChromaDB 不允许单次 upsert 内 id 重复
+        merged = {r["id"]: r for records, _ in batch for r in records}
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(get_io_pool(), self._upsert_fn, list(merged.values()))
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_result(None)
+
 
 class ChromaVectorStore:
     """
@@ -23,6 +81,7 @@ class ChromaVectorStore:
         self.persist_dir = str(persist_dir or DEFAULT_CHROMA_PATH)
         self._client: Optional[chromadb.ClientAPI] = None
         self._paper_col = None
+        self._writer = _UpsertBatcher(self._upsert_records)
 
     async def initialize(self):
         pathlib.Path(self.persist_dir).mkdir(parents=True, exist_ok=True)
@@ -54,23 +113,53 @@ class ChromaVectorStore:
         image_path: str = "",
         metadata: Optional[Dict] = None,
     ) -> None:
+        meta = self._chunk_metadata(paper_id, content_type, page_num, image_path, metadata,
+                                    datetime.datetime.utcnow().isoformat())
+        self._paper_col.upsert(
+            ids=[chunk_id],
+            embeddings=[vector],
+            documents=[content],
+            metadatas=[meta],
+        )
+
+    async def add_paper_chunks(self, paper_id: str, chunks: List[Dict]) -> None:
+        """
+        批量写入，一次 upsert 代替逐条调用；并发上传的批次会再合并为一次写入。
+        chunks 每项包含 chunk_id / content / content_type / vector，可选 page_num / image_path / metadata。
+        """
+        if not chunks:
+            return
+        now = datetime.datetime.utcnow().isoformat()
+        await self._writer.submit([{
+            "id": c["chunk_id"],
+            "embedding": c["vector"],
+            "document": c["content"],
+            "metadata": self._chunk_metadata(paper_id, c["content_type"], c.get("page_num", 0),
+                                             c.get("image_path", ""), c.get("metadata"), now),
+        } for c in chunks])
+
+    @staticmethod
+    def _chunk_metadata(paper_id: str, content_type: str, page_num: int, image_path: str,
+                        metadata: Optional[Dict], create_time: str) -> Dict:
         meta = {
             "paper_id": paper_id,
             "content_type": content_type,
             "page_num": page_num,
             "image_path": image_path,
-            "create_time": datetime.datetime.utcnow().isoformat(),
+            "create_time": create_time,
         }
         if metadata:
             # ChromaDB metadata 值只能是 str/int/float/bool
             for k, v in metadata.items():
                 meta[f"extra_{k}"] = str(v)
+        return meta
 
+    def _upsert_records(self, records: List[Dict]) -> None:
         self._paper_col.upsert(
-            ids=[chunk_id],
-            embeddings=[vector],
-            documents=[content],
-            metadatas=[meta],
+            ids=[r["id"] for r in records],
+            embeddings=[r["embedding"] for r in records],
+            documents=[r["document"] for r in records],
+            metadatas=[r["metadata"] for r in records],
         )
 
     async def search_similar(
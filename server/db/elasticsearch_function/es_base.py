@@ -39,12 +39,15 @@ class ElasticsearchBase(BaseStorage):
             passwd = self.config_dict['password']
             user = self.config_dict['user']
             verify_certs = self.config_dict.get('verify_certs', False)
+            # 每个节点保持的长连接数，并发请求复用连接而不是排队等待
+            connections_per_node = self.config_dict.get('connections_per_node', 32)
 
             self.es_connect = AsyncElasticsearch(
                 hosts=ip, 
                 verify_certs=verify_certs, 
                 basic_auth=(user, passwd),
-                request_timeout=30
+                request_timeout=30,
+                connections_per_node=connections_per_node
             )
         except Exception as e:
             logger.error(f"ES Connection failed: {e}")
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import asyncio
 import datetime
-from typing import List, Dict, Optional
+from typing import AsyncIterable, Iterable, List, Dict, Optional, Sequence, Union
+import numpy as np
+from elasticsearch.helpers import async_bulk
 from server.db.elasticsearch_function.es_base import ElasticsearchBase
 from server.utils.logger import logger
 
@@ -11,6 +14,18 @@ from server.utils.logger import logger
 # """
 
 
+def quantize_int8(vector: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+    """
+    按向量自身最大绝对值缩放到 int8，用于 element_type 为 byte 的 dense_vector 字段。
+    各向量的缩放比例不同，字段相似度需使用 cosine（与缩放无关），不能用 dot_product。
+    """
+    v = np.asarray(vector, dtype=np.float32)
+    max_abs = float(np.max(np.abs(v))) if v.size else 0.0
+    if max_abs == 0.0:
+        return np.zeros(v.size, dtype=np.int8)
+    return np.clip(np.round(v * (127.0 / max_abs)), -128, 127).astype(np.int8)
+
+
 class ESPaperStore(ElasticsearchBase):
     storage_name = "es_paper"
 
@@ -39,9 +54,40 @@ class ESPaperStore(ElasticsearchBase):
             }
         }
         self.paper_body = self.config_dict['body'].get('paper_body', default_mapping)
+        # mapping 中 vector 为 byte 类型时，写入与查询前都要量化为 int8
+        vector_mapping = self.paper_body.get("mappings", {}).get("properties", {}).get("vector", {})
+        self.byte_vectors = vector_mapping.get("element_type") == "byte"
+        # 单条写入的并发上限与连接池大小一致，大量 gather 时不会在连接池外堆积请求
+        self._sem = asyncio.Semaphore(self.config_dict.get('connections_per_node', 32))
+
+    def _encode_vector(self, vector: Union[List[float], np.ndarray]) -> Union[List[float], str]:
+        if self.byte_vectors:
+            # byte 向量以十六进制字符串提交（ES 8.14+），每维 2 个字符，免去逐个整数的 JSON 编解码
+            return quantize_int8(vector).tobytes().hex()
+        if isinstance(vector, np.ndarray):
+            return vector.tolist()
+        return vector
 
     async def initialize(self):
         await self._create_index_if_not_exists(self.paper_index, self.paper_body)
+        await self._sync_vector_encoding()
+
+    async def _sync_vector_encoding(self):
+        """
+        按线上索引的实际 mapping 决定向量编码：早先以 float 向量建好的索引会拒绝 hex 向量，
+        而 bulk 写入不抛错只记日志，配置与索引不一致时数据会被静默丢弃。
+        """
+        mapping = await self.es_connect.indices.get_mapping(index=self.paper_index)
+        # 索引名可能是别名，取实际索引的 mapping
+        index_mapping = next(iter(mapping.values()))
+        vector_mapping = index_mapping["mappings"].get("properties", {}).get("vector", {})
+        live_byte = vector_mapping.get("element_type", "float") == "byte"
+        if live_byte != self.byte_vectors:
+            logger.warning(
+                f"[ESPaperStore] index {self.paper_index} vector element_type is "
+                f"{vector_mapping.get('element_type', 'float')}, config differs; encoding to match the index"
+            )
+        self.byte_vectors = live_byte
 
     async def add_paper_chunk(self, 
                               paper_id: str, 
@@ -50,8 +96,9 @@ class ESPaperStore(ElasticsearchBase):
                               content_type: str,
                               image_path: str,
                               page_num: int,
-                              vector: List[float], 
+                              vector: Union[List[float], np.ndarray], 
                               metadata: Dict = None):
+        vector = self._encode_vector(vector)
         doc = {
             "paper_id": paper_id,
             "chunk_id": chunk_id,
@@ -63,13 +110,74 @@ class ESPaperStore(ElasticsearchBase):
             "metadata": metadata or {},
             "create_time": datetime.datetime.now().isoformat()
         }
-        await self.es_connect.index(index=self.paper_index, document=doc)
+        async with self._sem:
+            await self.es_connect.index(index=self.paper_index, document=doc)
+
+    async def bulk_add_paper_chunks(self,
+                                    paper_id: str,
+                                    chunks: Union[Iterable[Dict], AsyncIterable[Dict]],
+                                    chunk_size: int = 500,
+                                    max_chunk_bytes: int = 10 * 1024 * 1024,
+                                    pause_refresh: bool = False):
+        """
+        通过 _bulk 批量写入，chunks 可以是（异步）生成器，内存占用只与 chunk_size 相关。
+        pause_refresh 仅用于一次性的大批量导入：写入期间关闭整个索引的自动 refresh，结束后恢复默认。
+        该设置作用于共享索引，并发上传时不要开启，否则可能在其他写入进行中被改回或一直保持关闭。
+        """
+        now = datetime.datetime.now().isoformat()
+
+        async def actions():
+            if hasattr(chunks, "__aiter__"):
+                async for c in chunks:
+                    yield self._bulk_action(paper_id, c, now)
+            else:
+                for c in chunks:
+                    yield self._bulk_action(paper_id, c, now)
+
+        if pause_refresh:
+            await self.es_connect.indices.put_settings(
+                index=self.paper_index, settings={"index": {"refresh_interval": "-1"}})
+        try:
+            success, errors = await async_bulk(
+                self.es_connect, actions(),
+                chunk_size=chunk_size,
+                max_chunk_bytes=max_chunk_bytes,
+                request_timeout=120,
+                raise_on_error=False,
+            )
+        finally:
+            if pause_refresh:
+                await self.es_connect.indices.put_settings(
+                    index=self.paper_index, settings={"index": {"refresh_interval": None}})
+        if errors:
+            logger.error(f"[ESPaperStore] bulk index: {len(errors)} failed, first: {errors[0]}")
+        return success
+
+    def _bulk_action(self, paper_id: str, chunk: Dict, create_time: str) -> Dict:
+        vector = self._encode_vector(chunk["vector"])
+        source = {
+            "paper_id": paper_id,
+            "chunk_id": chunk["chunk_id"],
+            "content": chunk["content"],
+            "content_type": chunk["content_type"],
+            "image_path": chunk.get("image_path", ""),
+            "page_num": chunk.get("page_num", 0),
+            "vector": vector,
+            "metadata": chunk.get("metadata") or {},
+            "create_time": create_time,
+        }
+        return {
+            "_op_type": "index",
+            "_index": self.paper_index,
+            "_id": chunk["chunk_id"],
+            "_source": source,
+        }
 
     async def search_similar(self, vector: List[float], top_k: int = 20):
         query = {
             "knn": {
                 "field": "vector",
-                "query_vector": vector,
+                "query_vector": self._encode_vector(vector),
                 "k": top_k,
                 "num_candidates": 100
             },
@@ -118,7 +226,7 @@ class ESPaperStore(ElasticsearchBase):
             # 1. 向量检索部分
             "knn": {
                 "field": "vector",
-                "query_vector": vector,
+                "query_vector": self._encode_vector(vector),
                 "k": top_k,
                 "num_candidates": 100,
                 "boost": knn_boost
@@ -1,5 +1,6 @@
 import yaml
 import pathlib
+from typing import List, Tuple
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.future import select
@@ -99,11 +100,36 @@ class PostgresStore(BaseStorage):
             session.add(new_paper)
         logger.info(f"[db] add_paper_metadata执行成功, paper_uuid={paper_uuid}")
     
+    async def bulk_insert_papers(self, rows: List[Tuple[str, str, str, str]]):
+        """
+        批量写入论文元数据，rows 每项为 (paper_uuid, title, uploader_uuid, file_path)。
+        走 asyncpg 的二进制 COPY 协议，不再逐行解析、规划 INSERT。
+        """
+        if not rows:
+            return
+        logger.info(f"[db] 开始bulk_insert_papers, count={len(rows)}")
+        async with self.engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            # is_processed 的默认值由 ORM 填充，COPY 不经过 ORM，需要显式写入
+            await raw.driver_connection.copy_records_to_table(
+                PaperMetadata.__tablename__,
+                records=[(*row, False) for row in rows],
+                columns=["paper_uuid", "title", "uploader_uuid", "file_path", "is_processed"],
+            )
+        logger.info(f"[db] bulk_insert_papers执行成功, count={len(rows)}")
+
     async def delete_paper_metadata(self, paper_uuid: str):
         async with self.get_session() as session:
             stmt = delete(PaperMetadata).where(PaperMetadata.paper_uuid == paper_uuid)
             await session.execute(stmt)
 
+    async def delete_papers_metadata(self, paper_uuids: List[str]):
+        if not paper_uuids:
+            return
+        async with self.get_session() as session:
+            stmt = delete(PaperMetadata).where(PaperMetadata.paper_uuid.in_(paper_uuids))
+            await session.execute(stmt)
+
     async def mark_paper_processed(self, paper_uuid: str):
         logger.info(f"[db] 开始mark_paper_processed, paper_uuid={paper_uuid}")
         async with self.get_session() as session:
@@ -57,6 +57,7 @@ class SQLiteStore:
                 page_count      INTEGER DEFAULT 0,
                 is_processed    INTEGER NOT NULL DEFAULT 0,
                 parse_mode      TEXT DEFAULT 'pymupdf',
+                checksum        TEXT,
                 created_at      TEXT NOT NULL
             );
 
@@ -135,6 +136,14 @@ class SQLiteStore:
                 "ALTER TABLE paper_metadata ADD COLUMN page_count INTEGER DEFAULT 0"
             )
             logger.info("[SQLiteStore] migrated: added page_count to paper_metadata")
+        if "checksum" not in columns:
+            await self._conn.execute(
+                "ALTER TABLE paper_metadata ADD COLUMN checksum TEXT"
+            )
+            logger.info("[SQLiteStore] migrated: added checksum to paper_metadata")
+        await self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_paper_checksum ON paper_metadata(checksum)"
+        )
 
     # ------------------------------------------------------------------ #
     # Papers
@@ -151,15 +160,16 @@ class SQLiteStore:
         publish_year: Optional[int] = None,
         parse_mode: str = "pymupdf",
         page_count: int = 0,
+        checksum: Optional[str] = None,
     ) -> None:
         now = datetime.datetime.utcnow().isoformat()
         await self._conn.execute(
             """INSERT OR IGNORE INTO paper_metadata
                (paper_uuid, title, authors, publish_year, abstract, doi, arxiv_id,
-                file_path, page_count, is_processed, parse_mode, created_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)""",
+                file_path, page_count, is_processed, parse_mode, checksum, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?)""",
             (paper_uuid, title, authors, publish_year, abstract, doi, arxiv_id,
-             file_path, page_count, parse_mode, now)
+             file_path, page_count, parse_mode, checksum, now)
         )
         await self._conn.commit()
 
@@ -177,6 +187,16 @@ class SQLiteStore:
             row = await cur.fetchone()
             return dict(row) if row else None
 
+    async def get_paper_by_checksum(self, checksum: str) -> Optional[Dict]:
+        """按文件 SHA-256 查找已处理完成的论文，用于重复上传去重。"""
+        async with self._conn.execute(
+            """SELECT * FROM paper_metadata
+               WHERE checksum = ? AND is_processed = 1
+               ORDER BY created_at DESC LIMIT 1""", (checksum,)
+        ) as cur:
+            row = await cur.fetchone()
+            return dict(row) if row else None
+
     async def get_all_papers(self) -> List[Dict]:
         async with self._conn.execute(
             "SELECT * FROM paper_metadata ORDER BY created_at DESC"
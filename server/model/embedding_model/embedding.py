@@ -1,16 +1,72 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from typing import List
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+import numpy as np
 from openai import AsyncOpenAI
 from server.config.config_loader import get_config
 from server.utils.logger import logger
 
+EMBED_CACHE_SIZE = 10_000  # 向量缓存条数上限（LRU 淘汰）
+BATCH_MAX_SIZE = 64        # 合并单条请求时每批最多文本数
+
+
+class EmbeddingBatcher:
+    """
+    动态攒批：把并发到达的单条请求合并成一次批量调用。
+    没有批次在途时立即提交，单条查询不额外等待；
+    已有批次在途时先排队，该批完成或攒满 max_batch_size 时再提交。
+    """
+
+    def __init__(self, batch_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+                 max_batch_size: int = BATCH_MAX_SIZE):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._running: Set[asyncio.Task] = set()  # 持有引用，防止批任务被 GC
+
+    async def submit(self, text: str) -> List[float]:
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((text, fut))
+        if not self._running or len(self._pending) >= self.max_batch_size:
+            self._flush()
+        return await fut
+
+    def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        # 在途批次结束时，把期间排队的请求作为下一批提交
+        if not self._running:
+            self._flush()
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            vectors = await self._batch_fn([text for text, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), vector in zip(batch, vectors):
+            if not fut.done():
+                fut.set_result(vector)
+
 
 class EmbeddingManager:
     """
     通过 OpenAI-compatible API 获取文本向量。
     单例模式，在 get_embedding() 时懒初始化客户端。
+    按文本内容哈希缓存向量，跨论文复用（页眉页脚等重复文本不再重复请求）。
     """
 
     _instance = None
@@ -19,6 +75,8 @@ class EmbeddingManager:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
+            cls._instance._cache = OrderedDict()
+            cls._instance._batcher = EmbeddingBatcher(cls._instance.get_embeddings_batch)
         return cls._instance
 
     def _init_client(self):
@@ -34,32 +92,62 @@ class EmbeddingManager:
         self._initialized = True
         logger.info(f"[EmbeddingManager] model={self.model_name}, dims={self.dimensions}")
 
+    # ------------------------------------------------------------------ #
+    # Cache
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[List[float]]:
+        vector = self._cache.get(key)
+        if vector is None:
+            return None
+        self._cache.move_to_end(key)
+        return vector.tolist()  # 每次返回新 list，调用方之间不共享可变对象
+
+    def _cache_put(self, key: bytes, vector: List[float]) -> None:
+        # 存 float32 数组（1536 维约 6 KB），Python list[float] 约 48 KB
+        self._cache[key] = np.asarray(vector, dtype=np.float32)
+        self._cache.move_to_end(key)
+        if len(self._cache) > EMBED_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
     async def get_embedding(self, text: str) -> List[float]:
+        """单条请求经 EmbeddingBatcher 与同时到达的其他请求合并为一次批量调用。"""
         self._init_client()
         if not text or not text.strip():
             return [0.0] * self.dimensions
-        try:
-            response = await self._client.embeddings.create(
-                input=text,
-                model=self.model_name,
-            )
-            return response.data[0].embedding
-        except Exception as e:
-            logger.error(f"[EmbeddingManager] get_embedding failed: {e}")
-            raise
+        cached = self._cache_get(self._cache_key(text))
+        if cached is not None:
+            return cached
+        return await self._batcher.submit(text)
 
     async def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """批量获取向量，减少 API 调用次数。"""
+        """批量获取向量，减少 API 调用次数；命中缓存和批内重复的文本不再请求。"""
         self._init_client()
         if not texts:
             return []
-        try:
-            response = await self._client.embeddings.create(
-                input=texts,
-                model=self.model_name,
-            )
+        keys = [self._cache_key(t) for t in texts]
+        vectors = {k: v for k in keys if (v := self._cache_get(k)) is not None}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            try:
+                response = await self._client.embeddings.create(
+                    input=list(missing.values()),
+                    model=self.model_name,
+                )
+            except Exception as e:
+                logger.error(f"[EmbeddingManager] get_embeddings_batch failed: {e}")
+                raise
             # API 返回顺序与输入一致
-            return [item.embedding for item in response.data]
-        except Exception as e:
-            logger.error(f"[EmbeddingManager] get_embeddings_batch failed: {e}")
-            raise
+            for key, item in zip(missing, response.data):
+                vectors[key] = item.embedding
+                self._cache_put(key, item.embedding)
+        return [vectors[k] for k in keys]
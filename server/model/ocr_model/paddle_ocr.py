@@ -1,12 +1,25 @@
 import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
 import json
 from httpx import AsyncClient
-from typing import List, Dict, Any, AsyncGenerator
+from typing import List, Dict, Any, AsyncGenerator, Optional, Tuple, Union
 from paddleocr import PPStructureV3
 from server.model.base_model import BaseAIModel
+from server.config.config_loader import get_config
+
+try:
+    # 可选：libjpeg-turbo 的 SIMD 编码，比 cv2.imwrite 快数倍
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    _turbo_jpeg = None
+
+CROP_JPEG_QUALITY = 80  # 裁剪图（图表、表格截图）的 JPEG 质量
 
 """
 from paddleocr import PPStructureV3
@@ -37,6 +50,15 @@ class PaddleOCRPipeline(BaseAIModel):
     def _setup(self) -> None:
         self.model_name = self.kwargs.get("model_name")
         self.temperature = self.kwargs.get("temperature", 0.7)
+        # PP-Structure 推理不保证线程安全，多线程共享同一引擎时串行调用
+        self._predict_lock = threading.Lock()
+        # 专用线程池 + 信号量：不占用默认执行器，并发上传时也不会让 GPU 显存超卖
+        use_gpu = self.kwargs.get('use_gpu', False)
+        # GPU：单线程 + 批量推理；CPU：多线程并行裁剪、编码等前后处理
+        workers = 1 if use_gpu else max(1, (os.cpu_count() or 1) // 2)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ppocr")
+        self._gpu_sem = asyncio.Semaphore(workers)
+        self.batch_size = 1
         
         if self.mode == "api":
             self._engine = AsyncClient(
@@ -47,71 +69,156 @@ class PaddleOCRPipeline(BaseAIModel):
             self.use_gpu = self.kwargs.get('use_gpu', False)
             ocr_version = self.kwargs.get('ocr_version', "PP-OCRv5")
             lang = self.kwargs.get('lang', 'ch')
-            # 初始化 PP-Structure
-            self._engine = PPStructureV3(lang=lang,ocr_version=ocr_version,
-                                        use_doc_orientation_classify=True,
-                                        use_table_recognition=True,
-                                        use_doc_unwarping=True,
-                                        use_textline_orientation=True,
-                                        use_region_detection=True,
-                                        device="gpu" if self.use_gpu else "cpu")
-    
+            # CPU 上识别本就串行，batch=1 可大幅减小 Paddle 预分配的内存池；GPU 上批量才有收益
+            rec_batch_num = self.kwargs.get('rec_batch_num', 16 if self.use_gpu else 1)
+            # 一次 predict 送入的页数：GPU 上多页一起推理摊薄调度开销，CPU 上逐页即可
+            self.batch_size = self.kwargs.get('page_batch_size', 8 if self.use_gpu else 1)
+            engine_kwargs = dict(lang=lang, ocr_version=ocr_version,
+                                 text_recognition_batch_size=rec_batch_num,
+                                 textline_orientation_batch_size=rec_batch_num,
+                                 use_doc_orientation_classify=True,
+                                 use_table_recognition=True,
+                                 use_doc_unwarping=True,
+                                 use_textline_orientation=True,
+                                 use_region_detection=True,
+                                 device="gpu" if self.use_gpu else "cpu",
+                                 cpu_threads=self.kwargs.get('cpu_threads', os.cpu_count() or 1))
+            if not self.use_gpu:
+                # CPU 上走 oneDNN 内核；缓存按输入尺寸构建的 primitive，避免每页重建
+                engine_kwargs.update(enable_mkldnn=self.kwargs.get('enable_mkldnn', True),
+                                     mkldnn_cache_capacity=self.kwargs.get('mkldnn_cache_capacity', 10))
+            # 可选：指定更轻量的检测 / 识别模型（如 PP-OCRv5_mobile_det / PP-OCRv5_mobile_rec）
+            for key in ('text_detection_model_name', 'text_recognition_model_name'):
+                if self.kwargs.get(key):
+                    engine_kwargs[key] = self.kwargs[key]
+            # 加速选项：高性能推理插件需单独安装，仅在配置开启时使用；GPU 上使用 TensorRT FP16
+            accel_kwargs = {}
+            if self.kwargs.get("enable_hpi", False):
+                accel_kwargs["enable_hpi"] = True
+            if self.use_gpu:
+                accel_kwargs.update(use_tensorrt=True, precision="fp16")
+            # 初始化 PP-Structure；加速选项初始化失败时记录一次并回退默认推理
+            try:
+                self._engine = PPStructureV3(**engine_kwargs, **accel_kwargs)
+            except Exception as e:
+                if not accel_kwargs:
+                    raise
+                self.logger.warning(f"加速推理初始化失败 {sorted(accel_kwargs)}，回退默认推理: {e}")
+                self._engine = PPStructureV3(**engine_kwargs)
+            self._warmup()
+
+    def _warmup(self) -> None:
+        """用空白图跑一次推理，把 TensorRT / OpenVINO 的构建与调优开销放在初始化阶段"""
+        try:
+            dummy = np.zeros((640, 640, 3), dtype=np.uint8)
+            self._engine.predict([dummy] * self.batch_size)
+        except Exception as e:
+            self.logger.warning(f"预热失败: {e}")
 
-    async def async_invoke(self, img_path: str, output_dir: str = "", paper_index: int = 1) -> List[Dict[str, Any]]:
+
+    async def async_invoke(self, img: Union[str, np.ndarray], output_dir: str = "", paper_index: int = 1) -> List[Dict[str, Any]]:
         """
-        处理单张图片，返回版面分析后的元素列表
+        处理单张图片（路径或 BGR ndarray），返回版面分析后的元素列表
         output_dir: 用于保存裁剪下来的图片（图表、表格截图）
         """
         loop = asyncio.get_running_loop()
-        # 在线程池中运行 CPU 密集型任务
-        return await loop.run_in_executor(None, self._predict_sync, img_path, output_dir, paper_index)
-        
-    
-    def _predict_sync(self, img_path: str, output_dir: str = "", paper_index: int = 1) -> List[Dict[str, Any]]:
-        res = self._engine.predict(img_path)
-        # logger.info(f"结果存储至 {output_dir}")
+        # 在专用线程池中运行 CPU / GPU 密集型任务
+        async with self._gpu_sem:
+            return await loop.run_in_executor(self._pool, self._predict_sync, img, output_dir, paper_index)
+
+    async def invoke_batch(self, imgs: List[Union[str, np.ndarray]], output_dir: str = "",
+                           paper_indices: Optional[List[int]] = None,
+                           batch_size: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        多页批量推理，返回与输入顺序一致的逐页结果。
+        paper_indices 为各页页码（用于裁剪图命名），缺省为 1..n
+        batch_size 为每次 predict 送入的页数，缺省为 self.batch_size
+        """
+        paper_indices = paper_indices or list(range(1, len(imgs) + 1))
+        batch_size = batch_size or self.batch_size
+        loop = asyncio.get_running_loop()
+        results = []
+        for start in range(0, len(imgs), batch_size):
+            end = start + batch_size
+            async with self._gpu_sem:
+                results.extend(await loop.run_in_executor(
+                    self._pool, self._predict_batch_sync, imgs[start:end], output_dir, paper_indices[start:end]))
+        return results
 
+    def _predict_sync(self, img: Union[str, np.ndarray], output_dir: str = "", paper_index: int = 1) -> List[Dict[str, Any]]:
+        return self._predict_batch_sync([img], output_dir, [paper_index])[0]
+
+    def _predict_batch_sync(self, imgs: List[Union[str, np.ndarray]], output_dir: str,
+                            paper_indices: List[int]) -> List[List[Dict[str, Any]]]:
+        imgs = [self._to_bgr(img) for img in imgs]
+        with self._predict_lock:
+            res = list(self._engine.predict(imgs if len(imgs) > 1 else imgs[0]))
         # for r in res:
         #     ocr_result = r.json
         #     print(r.markdown)
         #     logger.info(f"第 {paper_index} 页 OCR 结果: {ocr_result}")
             # self.save_json(paper_index, ocr_result, output_dir)
-        result_list = []
-        for r in res:
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # predict 对每张输入图按顺序返回一个结果
+        results = []
+        for img, paper_index, r in zip(imgs, paper_indices, res):
             result_dict = r.json.get("res", {})
             for index, parsing_result in enumerate(result_dict["parsing_res_list"]):
                 if parsing_result['block_label'] in ['image', 'table']:
                     # 裁剪图片保存路径
-                    img_path_saved = self._save_crop_img(img_path, parsing_result['block_bbox'], output_dir, f"paper{paper_index}_block_{index}")
+                    img_path_saved = self._save_crop_img(img, parsing_result['block_bbox'], output_dir, f"paper{paper_index}_block_{index}")
                     parsing_result['image_path'] = img_path_saved
-            result_list.append(result_dict)
-        return result_list
+            results.append([result_dict])
+        return results
+
+    @staticmethod
+    def _to_bgr(img: Union[str, np.ndarray]) -> np.ndarray:
+        if not isinstance(img, np.ndarray):
+            # 路径输入只解码一次，推理与裁剪共用同一份数组
+            img = cv2.imread(img)
+            if img is None:
+                raise ValueError("无法读取图片")
+        elif img.ndim == 2:
+            # 灰度渲染的页面，模型输入要求三通道 BGR
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        return img
     
-    def _save_crop_img(self, img_path: str, bbox: List[int], output_dir: str, name_prefix: str) -> str:
+    def _save_crop_img(self, img: np.ndarray, bbox: List[int], output_dir: str, name_prefix: str) -> str:
         """裁剪并保存图片"""
         try:
-            img = cv2.imread(img_path)
             if img is None:
                 return ""
-            x1, y1, x2, y2 = [int(v) for v in bbox]
-            # 边界检查
+            # 边界检查：一次向量化裁剪到图像范围内
             h, w = img.shape[:2]
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(w, x2), min(h, y2)
-            
-            crop_img = img[y1:y2, x1:x2]
+            box = np.clip(np.asarray(bbox, dtype=np.float64), 0, (w, h, w, h)).astype(np.int32)
+            x1, y1, x2, y2 = box.tolist()
+
+            crop_img = img[y1:y2, x1:x2]  # 视图切片，无拷贝
             if crop_img.size == 0:
                 return ""
-                
-            os.makedirs(output_dir, exist_ok=True)
+
             rel_path = f"{name_prefix}.jpg"
             full_path = os.path.join(output_dir, rel_path)
-            cv2.imwrite(full_path, crop_img)
+            data = self._encode_jpeg(crop_img)
+            if not data:
+                return ""
+            with open(full_path, "wb") as f:
+                f.write(data)
             return full_path # 实际生产中这里应该上传到 OSS/S3 并返回 URL
         except Exception as e:
             self.logger.error(f"保存裁剪图片失败: {str(e)}")
             return ""
 
+    @staticmethod
+    def _encode_jpeg(img: np.ndarray) -> bytes:
+        """BGR 图像编码为 JPEG 字节，优先走 TurboJPEG，否则用 OpenCV 内存编码"""
+        if _turbo_jpeg is not None:
+            return _turbo_jpeg.encode(np.ascontiguousarray(img), quality=CROP_JPEG_QUALITY, pixel_format=TJPF_BGR)
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, CROP_JPEG_QUALITY,
+                                             cv2.IMWRITE_JPEG_OPTIMIZE, 0])
+        return buf.tobytes() if ok else b""
+
     def save_json(self, idx, ocr_result, output_dir: str):
         os.makedirs(output_dir, exist_ok=True)
         json_path = os.path.join(output_dir, f"page_{idx+1}_structure.json")
@@ -121,4 +228,32 @@ class PaddleOCRPipeline(BaseAIModel):
 
     async def async_stream(self, *args, **kwargs) -> AsyncGenerator[Any, None]:
         "无调用"
-        pass
\ No newline at end of file
+        pass
+
+
+# ── 工厂函数（模型只加载一次，供各 PDFParser 复用）──────────────────────────
+
+_instances: Dict[Tuple[bool, str], PaddleOCRPipeline] = {}
+_instances_lock = threading.Lock()
+
+
+def get_ocr_pipeline(use_gpu: bool = False, lang: str = "ch") -> PaddleOCRPipeline:
+    """按 (use_gpu, lang) 返回全局单例 PaddleOCRPipeline，避免每次上传都重新加载模型。"""
+    key = (use_gpu, lang)
+    with _instances_lock:
+        if key not in _instances:
+            config = {
+                "name": "paddle_ocr",
+                "type": "ocr",
+                "mode": "local",
+                "provider": "paddleocr",
+                "use_gpu": use_gpu,
+                "kwargs": {
+                    "ocr_version": "PP-OCRv5",
+                    "lang": lang,
+                    "use_gpu": use_gpu,
+                    "enable_hpi": get_config().get("parser", {}).get("enable_hpi", False),
+                }
+            }
+            _instances[key] = PaddleOCRPipeline(config)
+        return _instances[key]
@@ -1,25 +1,51 @@
-import numpy as np
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
+from server.config.config_loader import get_config
+from server.utils.logger import logger
+
 
 class RankerManager:
+    """
+    基于 Cross-Encoder（sentence-transformers）的重排模型。
+    单例模式，首次 get_ranker() 时在推理线程中懒加载模型。
+    推理放在单线程池中：torch 模型非线程安全需串行使用，同时不阻塞事件循环。
+    """
+
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(RankerManager, cls).__new__(cls)
-            # self.model = SentenceTransformer('all-MiniLM-L6-v2') # 示例
+            cls._instance._initialized = False
+            cls._instance._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ranker")
         return cls._instance
 
-    # todo: 重新书写
+    def _init_model(self):
+        if self._initialized:
+            return
+        from sentence_transformers import CrossEncoder
+        cfg = get_config().get("reranker", {})
+        self.model_name = cfg.get("model_name", "BAAI/bge-reranker-base")
+        self.batch_size = cfg.get("batch_size", 32)
+        self.model = CrossEncoder(self.model_name)
+        self._initialized = True
+        logger.info(f"[RankerManager] model={self.model_name}, batch_size={self.batch_size}")
+
+    def _predict_sync(self, pairs: List[tuple]) -> List[float]:
+        self._init_model()
+        scores = self.model.predict(pairs, batch_size=self.batch_size, convert_to_numpy=True)
+        return scores.tolist()
+
     async def get_ranker(self, input_1: list, input_2: list) -> List[float]:
         """
-        生成文本向量。
-        这里使用随机向量作为占位符 (维度 1024)。
+        对 (input_1[i], input_2[i]) 逐对计算相关性分数。
+        所有文本对在一次批量前向中完成，返回与输入等长的分数列表。
         """
-        # 模拟延时
-        # await asyncio.sleep(0.01)
-        
-        # 真实场景示例:
-        # return self.model.encode(text).tolist()
-        
-        return np.random.rand(1024).tolist()
\ No newline at end of file
+        if not input_1:
+            return []
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._predict_sync, list(zip(input_1, input_2)))
@@ -31,6 +31,8 @@ from typing import Any, AsyncGenerator, Dict, Optional
 
 from server.model.base_model import BaseAIModel
 
+_CJK_RE = re.compile(r'[一-鿿㐀-䶿]')
+
 
 class TranslationModel(BaseAIModel):
     """
@@ -230,7 +232,7 @@ class TranslationModel(BaseAIModel):
         if hint in ("zh", "en"):
             return hint
         # 简单启发：CJK 字符占比 > 20% 则判定为中文，翻成英文
-        cjk = len(re.findall(r'[一-鿿㐀-䶿]', text))
+        cjk = len(_CJK_RE.findall(text))
         ratio = cjk / max(len(text), 1)
         return "en" if ratio > 0.2 else "zh"
 
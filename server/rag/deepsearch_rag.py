@@ -29,6 +29,9 @@ MAX_HOPS = 3
 QUALITY_OK = 0.65       # 此分以上认为检索充分
 FACT_CHECK_OK = 0.75    # 事实一致性通过线
 
+_JSON_ARRAY_RE = re.compile(r'\[.*?\]', re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r'\{.*?\}', re.DOTALL)
+
 
 @dataclass
 class ClaimVerification:
@@ -149,7 +152,7 @@ class DeepSearchRAG(BaseRAG):
             [{"role": "user", "content": prompt}], temperature=0.2
         )
         try:
-            m = re.search(r'\[.*?\]', resp, re.DOTALL)
+            m = _JSON_ARRAY_RE.search(resp)
             return json.loads(m.group()) if m else []
         except Exception:
             return []
@@ -187,7 +190,7 @@ class DeepSearchRAG(BaseRAG):
             [{"role": "user", "content": prompt}], temperature=0.1
         )
         try:
-            m = re.search(r'\[.*?\]', resp, re.DOTALL)
+            m = _JSON_ARRAY_RE.search(resp)
             return json.loads(m.group()) if m else []
         except Exception:
             return []
@@ -204,7 +207,7 @@ class DeepSearchRAG(BaseRAG):
             [{"role": "user", "content": prompt}], temperature=0.0
         )
         try:
-            m = re.search(r'\{.*?\}', resp, re.DOTALL)
+            m = _JSON_OBJECT_RE.search(resp)
             d = json.loads(m.group()) if m else {}
             return ClaimVerification(
                 claim=claim,
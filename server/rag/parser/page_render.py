@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PDF 页面光栅化。
+渲染进程池的子进程以 spawn 方式启动，反序列化任务时只会导入本模块；
+这里只依赖 PyMuPDF 和 numpy，避免每个子进程都加载 openai / chromadb 等重量级依赖。
+"""
+
+from typing import Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+
+def render_page(doc: fitz.Document, page_idx: int, dpi: int, grayscale: bool = False,
+                dump_path: Optional[str] = None) -> np.ndarray:
+    """渲染单页；灰度时返回 (h, w) 数组，由 OCR 侧在推理前转为 BGR"""
+    pix = doc.load_page(page_idx).get_pixmap(
+        matrix=fitz.Matrix(dpi / 72, dpi / 72),
+        colorspace=fitz.csGRAY if grayscale else fitz.csRGB,
+        alpha=False,
+    )
+    if dump_path:
+        pix.save(dump_path, jpg_quality=90)
+    if grayscale:
+        # pix 在函数返回后释放，灰度图需持有独立的一份数据（samples 即拷贝）
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+    import cv2  # 仅 OCR 路径需要，随 paddleocr 安装
+
+    # samples_mv 直接映射 pixmap 内存，cvtColor 一次完成 RGB→BGR 并输出新数组
+    rgb = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+# 子进程内缓存当前打开的文档，同一 PDF 的多页只打开一次
+_worker_doc: Optional[Tuple[str, fitz.Document]] = None
+
+
+def render_page_in_worker(file_path: str, page_idx: int, dpi: int, grayscale: bool,
+                          dump_path: Optional[str]) -> np.ndarray:
+    global _worker_doc
+    if _worker_doc is None or _worker_doc[0] != file_path:
+        if _worker_doc is not None:
+            _worker_doc[1].close()
+        _worker_doc = (file_path, fitz.open(file_path))
+    return render_page(_worker_doc[1], page_idx, dpi, grayscale, dump_path)
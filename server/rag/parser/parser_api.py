@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import re
 import uuid
 import pathlib
 
@@ -15,6 +16,9 @@ from server.utils.logger import logger
 
 router = APIRouter(prefix="/papers")
 
+# 文件名中不允许出现的字符（路径分隔符及 Windows 保留字符），模块级预编译
+_INVALID_FS_CHARS = re.compile(r'[\\/*?:"<>|]')
+
 
 def _get_papers_dir() -> pathlib.Path:
     cfg = get_config()
@@ -26,7 +30,7 @@ def _get_papers_dir() -> pathlib.Path:
 @router.post("/upload")
 async def upload_paper(
     pdf_file: UploadFile = File(...),
-    parse_mode: str = Form("pymupdf"),  # pymupdf | paddleocr
+    parse_mode: str = Form("auto"),  # auto | pymupdf | paddleocr
 ):
     """
     上传 PDF 论文，构建多步 Task 并提交到 TaskManager。
@@ -41,7 +45,7 @@ async def upload_paper(
 
     async def save_file():
         papers_dir = _get_papers_dir()
-        safe_name = f"{uuid.uuid4().hex}_{original_name}"
+        safe_name = f"{uuid.uuid4().hex}_{_INVALID_FS_CHARS.sub('', original_name or '')}"
         file_path = str(papers_dir / safe_name)
         with open(file_path, "wb") as f:
             f.write(content)
@@ -52,6 +56,9 @@ async def upload_paper(
         from server.rag.parser.pdf_parser import PDFParser
         parser = PDFParser(file_path, parse_mode=parse_mode)
         result = await parser.parse_and_save()
+        if result.get("status") == "already_processed":
+            # 重复上传：沿用已有论文，删除这次多存的文件
+            pathlib.Path(file_path).unlink(missing_ok=True)
         return result
 
     task.add_step("save_file", save_file)
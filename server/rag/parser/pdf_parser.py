@@ -8,16 +8,56 @@ import hashlib
 import pathlib
 import time
 import re
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 
 import fitz  # PyMuPDF
-from fastapi import HTTPException
+import numpy as np
 
 from server.config.config_loader import get_config
 from server.model.embedding_model.embedding import EmbeddingManager
 from server.db.db_factory import DBFactory
+from server.rag.parser.page_render import render_page, render_page_in_worker
+from server.utils.executors import get_io_pool, get_model_pool, get_render_pool
 from server.utils.logger import logger
 
+PIPELINE_QUEUE_SIZE = 4     # 流水线各阶段之间的队列上限，提供背压
+RENDER_QUEUE_SIZE = 2       # 内存中最多缓存的待识别页面位图数
+EMBED_BATCH_SIZE = 32       # 单次 Embedding 请求的最大文本数
+EMBED_FLUSH_INTERVAL = 0.2  # 凑不满一批时最多等待的秒数
+MIN_CHUNK_CHARS = 3         # 过短的 OCR 文本块（噪声）不做向量化
+SCAN_SAMPLE_PAGES = 3       # auto 模式下抽样判断是否为扫描件的页数
+SCAN_MIN_WORDS = 20         # 抽样页平均词数低于该值视为扫描件
+_CAPTION_RE = re.compile(r"^\s*(fig\.?|figure|图)\s*\d", re.IGNORECASE)
+
+# 同时等待识别的页面数；实际推理并发由 PaddleOCRPipeline 的线程池与信号量控制
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", os.cpu_count() or 1))
+
+# 页面渲染进程池：MuPDF 光栅化是纯 CPU 计算，多进程绕开 GIL；页数较少时不值得跨进程传输
+RENDER_PROCESSES = int(os.getenv("RENDER_PROCESSES", os.cpu_count() or 1))
+RENDER_PROCESS_MIN_PAGES = 4
+
+# 校验和 / 元数据按 (绝对路径, 大小, mtime_ns) 缓存，同一文件重复解析时不再重读重算
+FILE_MEMO_SIZE = 4096
+_file_memo: "OrderedDict[Tuple, Any]" = OrderedDict()
+_file_memo_lock = threading.Lock()
+
+
+async def preload_ocr_pipeline() -> None:
+    """服务启动时预加载 OCR 模型，首个上传不再承担模型加载与预热耗时。"""
+    try:
+        from server.model.ocr_model.paddle_ocr import get_ocr_pipeline
+    except ImportError:
+        logger.warning("[PDFParser] PaddleOCR not installed, skip preload")
+        return
+    await asyncio.get_running_loop().run_in_executor(get_model_pool(), get_ocr_pipeline, False)
+    logger.info("[PDFParser] OCR pipeline preloaded")
+
+
+class PDFParseError(Exception):
+    """解析失败。parse_and_save 可能在后台任务中运行，不直接抛 HTTP 异常，由调用方决定如何呈现。"""
+
 
 class PDFParser:
     """
@@ -37,49 +77,70 @@ class PDFParser:
         self.paper_uuid = uuid.uuid4().hex
 
         cfg = get_config()
-        self.parse_mode = parse_mode or cfg.get("parser", {}).get("default_mode", "pymupdf")
+        parser_cfg = cfg.get("parser", {})
+        self.parse_mode = parse_mode or parser_cfg.get("default_mode", "pymupdf")
+        # OCR 模式的渲染参数：版面分析在 150~200 DPI 下精度基本不变；灰度渲染数据量仅 1/3
+        self.dpi = parser_cfg.get("dpi", 200)
+        self.grayscale = parser_cfg.get("grayscale", False)
+        # 调试用：把渲染的整页图另存为 JPEG（q=90，编码远快于 PNG）
+        self.keep_page_images = parser_cfg.get("keep_page_images", False)
 
         # 资源目录
         storage_cfg = cfg.get("storage", {})
         assets_root = pathlib.Path(storage_cfg.get("assets_dir", "./data/assets"))
         self.assets_dir = assets_root / self.paper_uuid
-        self.assets_dir.mkdir(parents=True, exist_ok=True)
 
         self.embedding_manager = EmbeddingManager()
+        # PDF 原始字节，解析期间只读盘一次，供元数据 / 文本抽取 / 渲染 / 校验和共用
+        self._pdf_bytes: Optional[bytes] = None
+        self._doc: Optional[fitz.Document] = None
 
     # ------------------------------------------------------------------ #
     # Public API
     # ------------------------------------------------------------------ #
-    async def parse_and_save(self) -> Dict[str, Any]:
-        """主流程：解析 → 向量化 → 入库"""
-        logger.info(f"[PDFParser] start parse: {self.file_path}, mode={self.parse_mode}")
-
+    async def parse_and_save(self, dpi: Optional[int] = None) -> Dict[str, Any]:
+        """主流程：解析 → 向量化 → 入库。dpi 可覆盖配置中的 OCR 渲染分辨率"""
+        if dpi:
+            self.dpi = dpi
         sqlite = DBFactory.get_sqlite()
         vector_store = DBFactory.get_vector_store()
 
-        # 1. 提取元数据
-        metadata = self._extract_metadata()
-        await sqlite.add_paper_metadata(
-            paper_uuid=self.paper_uuid,
-            title=metadata.get("title", "Untitled"),
-            file_path=self.file_path,
-            authors=metadata.get("author", ""),
-            parse_mode=self.parse_mode,
-            page_count=metadata.get("page_count", 0),
-        )
-
+        loop = asyncio.get_running_loop()
         try:
-            # 2. 解析文本块
+            # 0. 同一文件已处理过则直接复用，不再重复解析（读盘 + 哈希放到 io 线程池，不阻塞事件循环）
+            checksum = await loop.run_in_executor(get_io_pool(), self._calculate_checksum)
+            existing = await sqlite.get_paper_by_checksum(checksum)
+            if existing:
+                logger.info(f"[PDFParser] already processed: paper_uuid={existing['paper_uuid']}")
+                return {"status": "already_processed", "paper_uuid": existing["paper_uuid"]}
+
+            # 打开文档并抽样判断是否扫描件；损坏的文件在这里抛错，统一转为 PDFParseError
+            if self.parse_mode == "auto":
+                self.parse_mode = await loop.run_in_executor(get_io_pool(), self._detect_parse_mode)
+            logger.info(f"[PDFParser] start parse: {self.file_path}, mode={self.parse_mode}")
+
+            # 1. 提取元数据
+            metadata = await loop.run_in_executor(get_io_pool(), self._extract_metadata)
+            await sqlite.add_paper_metadata(
+                paper_uuid=self.paper_uuid,
+                title=metadata.get("title", "Untitled"),
+                file_path=self.file_path,
+                authors=metadata.get("author", ""),
+                parse_mode=self.parse_mode,
+                page_count=metadata.get("page_count", 0),
+                checksum=checksum,
+            )
+
+            # 2. 解析文本块 + 3. 批量向量化并写入 ChromaDB
             if self.parse_mode == "paddleocr":
-                chunks = await self._parse_with_paddleocr()
+                # OCR 模式下渲染 / 识别 / 入库以流水线方式重叠执行
+                chunks = await self._parse_with_paddleocr(vector_store)
             else:
                 chunks = await self._parse_with_pymupdf()
+                await self._embed_and_store(chunks, vector_store)
 
             logger.info(f"[PDFParser] got {len(chunks)} chunks")
 
-            # 3. 批量向量化并写入 ChromaDB
-            await self._embed_and_store(chunks, vector_store)
-
             # 4. 标记完成
             await sqlite.mark_paper_processed(self.paper_uuid)
             logger.info(f"[PDFParser] done: paper_uuid={self.paper_uuid}")
@@ -87,139 +148,374 @@ class PDFParser:
 
         except Exception as e:
             logger.error(f"[PDFParser] failed: {e}", exc_info=True)
-            raise HTTPException(status_code=500, detail=str(e))
+            raise PDFParseError(str(e)) from e
+        finally:
+            self._release()
 
     # ------------------------------------------------------------------ #
     # PyMuPDF 解析（默认，无额外依赖）
     # ------------------------------------------------------------------ #
     async def _parse_with_pymupdf(self) -> List[Dict]:
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._pymupdf_sync)
+        return await loop.run_in_executor(get_io_pool(), self._pymupdf_sync)
 
     def _pymupdf_sync(self) -> List[Dict]:
+        """
+        直接读取内嵌文本层。图片块落盘到 assets_dir，
+        紧随其后的图注作为 figure_title 块并关联图片路径。
+        """
         chunks = []
-        with fitz.open(self.file_path) as doc:
-            for page_num, page in enumerate(doc, start=1):
-                blocks = page.get_text("blocks")  # (x0, y0, x1, y1, text, block_no, block_type)
-                for block in blocks:
-                    text = block[4].strip()
-                    block_type = block[6]  # 0=text, 1=image
-                    if not text or block_type != 0:
-                        continue
-                    if len(text) < 10:  # 过滤噪声短文本
-                        continue
-                    chunks.append({
-                        "content": text,
-                        "content_type": "text",
-                        "page_num": page_num,
-                        "image_path": "",
-                    })
+        doc = self._document()
+        for page_num, page in enumerate(doc, start=1):
+            last_image = ""
+            for idx, block in enumerate(page.get_text("dict")["blocks"]):
+                if block["type"] == 1:  # 0=text, 1=image
+                    last_image = self._save_block_image(block, page_num, idx)
+                    continue
+                text = "\n".join(
+                    "".join(span["text"] for span in line["spans"])
+                    for line in block["lines"]
+                ).strip()
+                if len(text) < 10:  # 过滤噪声短文本
+                    continue
+                is_caption = bool(last_image) and bool(_CAPTION_RE.match(text))
+                chunks.append({
+                    "content": text,
+                    "content_type": "figure_title" if is_caption else "text",
+                    "page_num": page_num,
+                    "image_path": last_image if is_caption else "",
+                })
+                last_image = ""
         return chunks
 
+    def _save_block_image(self, block: Dict, page_num: int, idx: int) -> str:
+        image = block.get("image")
+        if not image:
+            return ""
+        # 目录按需创建：只有含图片的 PDF 才会落盘
+        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        path = self.assets_dir / f"paper{page_num}_block_{idx}.{block.get('ext', 'png')}"
+        path.write_bytes(image)
+        return str(path)
+
+    def _detect_parse_mode(self) -> str:
+        doc = self._document()
+        scanned = self._is_scanned(doc)
+        mode = "paddleocr" if scanned else "pymupdf"
+        logger.info(f"[PDFParser] auto mode -> {mode}")
+        return mode
+
+    @staticmethod
+    def _is_scanned(doc: fitz.Document) -> bool:
+        """均匀抽样几页，内嵌文本层几乎为空则判定为扫描件，需要走 OCR"""
+        if doc.page_count == 0:
+            return False
+        n = min(SCAN_SAMPLE_PAGES, doc.page_count)
+        step = doc.page_count / n
+        sample = [doc[int(i * step)] for i in range(n)]
+        words = sum(len(page.get_text("words")) for page in sample)
+        return words / n < SCAN_MIN_WORDS
+
     # ------------------------------------------------------------------ #
     # PaddleOCR 解析（可选，按需安装）
     # ------------------------------------------------------------------ #
-    async def _parse_with_paddleocr(self) -> List[Dict]:
+    async def _parse_with_paddleocr(self, vector_store=None) -> List[Dict]:
+        """
+        四段式流水线：渲染页面 → OCR 版面分析 → 向量化 → 写入向量库。
+        各阶段通过有界 asyncio.Queue 串联，None 作为结束标记；
+        传入 vector_store 时每页识别完即入库，否则只收集 chunks。
+        """
         try:
-            from server.model.ocr_model.paddle_ocr import PaddleOCRPipeline
+            from server.model.ocr_model.paddle_ocr import get_ocr_pipeline
         except ImportError:
             logger.warning("[PDFParser] PaddleOCR not installed, falling back to pymupdf")
-            return await self._parse_with_pymupdf()
+            chunks = await self._parse_with_pymupdf()
+            if vector_store is not None:
+                await self._embed_and_store(chunks, vector_store)
+            return chunks
 
-        # PDF → 图片（在线程池中执行，避免阻塞）
+        # 首次调用会加载模型并预热，放到独立的模型加载线程执行，等待期间不占用 io 线程池
+        ocr = await asyncio.get_running_loop().run_in_executor(get_model_pool(), get_ocr_pipeline, False)
+
+        # 批量推理时待识别队列至少能放下一整批，否则单批永远凑不满 ocr.batch_size
+        render_q: asyncio.Queue = asyncio.Queue(
+            maxsize=max(RENDER_QUEUE_SIZE, getattr(ocr, "batch_size", 1))
+        )
+        ocr_q: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        store_q: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        chunks: List[Dict] = []
+        workers = [
+            asyncio.create_task(self._render_worker(render_q)),
+            asyncio.create_task(self._ocr_stage(ocr, render_q, ocr_q)),
+            asyncio.create_task(self._embed_worker(ocr_q, store_q, chunks, vector_store is not None)),
+            asyncio.create_task(self._store_worker(store_q, vector_store)),
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # 任一阶段异常时取消其余阶段，避免阻塞在队列上
+            for w in workers:
+                w.cancel()
+        return chunks
+
+    async def _render_worker(self, render_q: asyncio.Queue) -> None:
+        """阶段 1：逐页消费渲染结果，渲染完一页立即交给 OCR，不必等整本渲染完成。"""
+        async for item in self.iter_rendered_pages():
+            await render_q.put(item)
+        await render_q.put(None)
+
+    async def iter_rendered_pages(self) -> AsyncIterator[Tuple[int, np.ndarray]]:
+        """
+        逐页渲染为内存位图，按页序 yield (page_num, img)，不落盘。
+        页数较多时分发到渲染进程池并行渲染，否则在线程中逐页渲染。
+        """
         loop = asyncio.get_running_loop()
-        image_paths = await loop.run_in_executor(None, self._convert_pdf_to_images)
-        config = {
-            "name": "paddle_ocr",
-            "type": "ocr",
-            "mode": "local",
-            "provider": "paddleocr",
-            "use_gpu": False,
-            "kwargs": {
-                "ocr_version": "PP-OCRv5",
-                "lang": "ch",
-                "use_gpu": False
-            }
-        }
+        pages_dir = self.assets_dir / "_pages"
+        if self.keep_page_images:
+            pages_dir.mkdir(parents=True, exist_ok=True)
 
-        ocr = PaddleOCRPipeline(config)
-        chunks = []
-        for page_idx, img_path in enumerate(image_paths):
-            page_num = page_idx + 1
+        def dump_path(i: int) -> Optional[str]:
+            return str(pages_dir / f"page_{i + 1}.jpg") if self.keep_page_images else None
+
+        doc = self._document()
+        page_count = len(doc)
+        if RENDER_PROCESSES > 1 and page_count > RENDER_PROCESS_MIN_PAGES:
+            pool = get_render_pool(RENDER_PROCESSES)
+            in_flight: deque = deque()
+            for i in range(page_count):
+                in_flight.append((i, loop.run_in_executor(
+                    pool, render_page_in_worker, self.file_path, i, self.dpi, self.grayscale, dump_path(i)
+                )))
+                # 在途页数不超过进程数，避免渲染结果在内存中堆积
+                if len(in_flight) >= RENDER_PROCESSES:
+                    idx, fut = in_flight.popleft()
+                    yield idx + 1, await fut
+            while in_flight:
+                idx, fut = in_flight.popleft()
+                yield idx + 1, await fut
+        else:
+            for i in range(page_count):
+                img = await loop.run_in_executor(
+                    get_io_pool(), render_page, doc, i, self.dpi, self.grayscale, dump_path(i)
+                )
+                yield i + 1, img
+
+    async def _ocr_stage(self, ocr, render_q: asyncio.Queue, ocr_q: asyncio.Queue) -> None:
+        """
+        阶段 2：OCR_CONCURRENCY 个 worker 并行消费页面，全部结束后通知下游。
+        批量推理（ocr.batch_size > 1）时只起一个 worker，多个 worker 会把就绪页面瓜分成小批。
+        """
+        workers = 1 if getattr(ocr, "batch_size", 1) > 1 else OCR_CONCURRENCY
+        await asyncio.gather(*[
+            self._ocr_worker(ocr, render_q, ocr_q) for _ in range(workers)
+        ])
+        await ocr_q.put(None)
+
+    async def _ocr_worker(self, ocr, render_q: asyncio.Queue, ocr_q: asyncio.Queue) -> None:
+        """
+        对渲染好的页面做版面分析，输出每页的 chunks。
+        队列中已有多页就绪时一次取至多 ocr.batch_size 页批量推理，不为凑批等待。
+        """
+        batch_size = getattr(ocr, "batch_size", 1)
+        done = False
+        while not done:
+            item = await render_q.get()
+            if item is None:
+                # 结束标记放回队列，让其余 worker 也能退出
+                await render_q.put(None)
+                break
+            batch = [item]
+            while len(batch) < batch_size and not render_q.empty():
+                item = render_q.get_nowait()
+                if item is None:
+                    await render_q.put(None)
+                    done = True
+                    break
+                batch.append(item)
+
+            for page_num, page_structure in await self._ocr_batch(ocr, batch):
+                page_chunks = self._structure_to_chunks(page_structure, page_num)
+                logger.debug("[PDFParser] OCR page %d done, %d chunks", page_num, len(page_chunks))
+                if page_chunks:
+                    await ocr_q.put(page_chunks)
+
+    async def _ocr_batch(self, ocr, batch: List[Tuple[int, np.ndarray]]) -> List[Tuple[int, Any]]:
+        """批量识别一组页面；整批失败时逐页重试，只跳过真正出错的页面。"""
+        page_nums = [page_num for page_num, _ in batch]
+        try:
+            structures = await ocr.invoke_batch([img for _, img in batch], str(self.assets_dir), page_nums)
+            return list(zip(page_nums, structures))
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"[PDFParser] OCR page {page_nums[0]} failed: {e}")
+                return []
+            logger.warning(f"[PDFParser] OCR pages {page_nums} failed, retrying page by page: {e}")
+        results = []
+        for page_num, img in batch:
             try:
-                page_structure = await ocr.async_invoke(img_path, str(self.assets_dir), page_num)
-                for item in page_structure:
-                    for res in item.get("parsing_res_list", []):
-                        label = res.get("block_label", "")
-                        if label not in {"text", "formula", "figure", "table", "figure_title"}:
-                            continue
-                        content = res.get("block_content", "").strip()
-                        if not content:
-                            continue
-                        chunks.append({
-                            "content": content,
-                            "content_type": label,
-                            "page_num": page_num,
-                            "image_path": res.get("image_path", ""),
-                        })
+                structures = await ocr.invoke_batch([img], str(self.assets_dir), [page_num])
             except Exception as e:
                 logger.error(f"[PDFParser] OCR page {page_num} failed: {e}")
-            finally:
-                # 清理整页临时图
-                if os.path.exists(img_path):
-                    os.remove(img_path)
+                continue
+            results.append((page_num, structures[0]))
+        return results
 
-        return chunks
+    async def _embed_worker(self, ocr_q: asyncio.Queue, store_q: asyncio.Queue,
+                            chunks: List[Dict], embed: bool) -> None:
+        """
+        阶段 3：跨页攒批向量化，结果交给入库阶段，同时汇总全部 chunks。
+        攒满 EMBED_BATCH_SIZE 或等待超过 EMBED_FLUSH_INTERVAL 即提交一批。
+        """
+        pending: List[Dict] = []
+
+        async def flush():
+            if embed and pending:
+                await store_q.put(await self._embed_batch(pending, offset=len(chunks)))
+            chunks.extend(pending)
+            pending.clear()
+
+        while True:
+            try:
+                if pending:
+                    page_chunks = await asyncio.wait_for(ocr_q.get(), timeout=EMBED_FLUSH_INTERVAL)
+                else:
+                    page_chunks = await ocr_q.get()
+            except asyncio.TimeoutError:
+                await flush()
+                continue
+            if page_chunks is None:
+                break
+            pending.extend(page_chunks)
+            if len(pending) >= EMBED_BATCH_SIZE:
+                await flush()
+        await flush()
+        await store_q.put(None)
 
-    def _convert_pdf_to_images(self, dpi: int = 200) -> List[str]:
-        temp_dir = self.assets_dir / "_pages"
-        temp_dir.mkdir(exist_ok=True)
-        paths = []
-        with fitz.open(self.file_path) as doc:
-            for i, page in enumerate(doc):
-                pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72))
-                out = str(temp_dir / f"page_{i + 1}.png")
-                pix.save(out)
-                paths.append(out)
-        return paths
+    async def _store_worker(self, store_q: asyncio.Queue, vector_store) -> None:
+        """阶段 4：写入向量库，与下一批的向量化并行进行。"""
+        while True:
+            records = await store_q.get()
+            if records is None:
+                break
+            await self._store_batch(records, vector_store)
+
+    @staticmethod
+    def _structure_to_chunks(page_structure: List[Dict], page_num: int) -> List[Dict]:
+        chunks = []
+        for item in page_structure:
+            for res in item.get("parsing_res_list", []):
+                label = res.get("block_label", "")
+                if label not in {"text", "formula", "figure", "table", "figure_title"}:
+                    continue
+                content = res.get("block_content", "").strip()
+                if len(content) < MIN_CHUNK_CHARS:
+                    continue
+                chunks.append({
+                    "content": content,
+                    "content_type": label,
+                    "page_num": page_num,
+                    "image_path": res.get("image_path", ""),
+                })
+        return chunks
 
     # ------------------------------------------------------------------ #
     # Embedding + ChromaDB
     # ------------------------------------------------------------------ #
-    async def _embed_and_store(self, chunks: List[Dict], vector_store) -> None:
-        BATCH = 20  # 每批最多 20 条，控制 API 并发
-        for i in range(0, len(chunks), BATCH):
-            batch = chunks[i: i + BATCH]
-            texts = [c["content"] for c in batch]
-            vectors = await self.embedding_manager.get_embeddings_batch(texts)
-
-            tasks = []
-            for j, (chunk, vec) in enumerate(zip(batch, vectors)):
-                chunk_id = f"{self.paper_uuid}_p{chunk['page_num']}_{chunk['content_type']}_{i + j}"
-                tasks.append(
-                    vector_store.add_paper_chunk(
-                        paper_id=self.paper_uuid,
-                        chunk_id=chunk_id,
-                        content=chunk["content"],
-                        content_type=chunk["content_type"],
-                        vector=vec,
-                        page_num=chunk["page_num"],
-                        image_path=chunk.get("image_path", ""),
-                    )
-                )
-            await asyncio.gather(*tasks)
+    async def _embed_and_store(self, chunks: List[Dict], vector_store, offset: int = 0) -> None:
+        """分批向量化并入库；上一批写库的同时请求下一批向量"""
+        store_task: Optional[asyncio.Task] = None
+        try:
+            for i in range(0, len(chunks), EMBED_BATCH_SIZE):
+                records = await self._embed_batch(chunks[i: i + EMBED_BATCH_SIZE], offset + i)
+                if store_task is not None:
+                    await store_task
+                store_task = asyncio.create_task(self._store_batch(records, vector_store))
+            if store_task is not None:
+                await store_task
+        finally:
+            if store_task is not None and not store_task.done():
+                store_task.cancel()
+
+    async def _embed_batch(self, batch: List[Dict], offset: int) -> List[Tuple[str, Dict, List[float]]]:
+        """对一批 chunk 请求向量，返回 (chunk_id, chunk, vector) 列表"""
+        vectors = await self.embedding_manager.get_embeddings_batch([c["content"] for c in batch])
+        return [
+            (f"{self.paper_uuid}_p{chunk['page_num']}_{chunk['content_type']}_{offset + j}", chunk, vec)
+            for j, (chunk, vec) in enumerate(zip(batch, vectors))
+        ]
+
+    async def _store_batch(self, records: List[Tuple[str, Dict, List[float]]], vector_store) -> None:
+        """一批记录一次写入向量库"""
+        await vector_store.add_paper_chunks(self.paper_uuid, [
+            {
+                "chunk_id": chunk_id,
+                "content": chunk["content"],
+                "content_type": chunk["content_type"],
+                "vector": vec,
+                "page_num": chunk["page_num"],
+                "image_path": chunk.get("image_path", ""),
+            }
+            for chunk_id, chunk, vec in records
+        ])
 
     # ------------------------------------------------------------------ #
     # Metadata
     # ------------------------------------------------------------------ #
     def _extract_metadata(self) -> Dict[str, Any]:
-        meta = {"title": os.path.basename(self.file_path), "author": ""}
         try:
-            with fitz.open(self.file_path) as doc:
-                m = doc.metadata
-                meta["title"] = m.get("title") or os.path.basename(self.file_path)
-                meta["author"] = m.get("author", "")
-                meta["page_count"] = len(doc)
+            return dict(self._memoized("metadata", self._read_metadata))
         except Exception as e:
             logger.error(f"[PDFParser] extract metadata failed: {e}")
-        return meta
+            return {"title": os.path.basename(self.file_path), "author": ""}
+
+    def _read_metadata(self) -> Dict[str, Any]:
+        doc = self._document()
+        m = doc.metadata
+        return {
+            "title": m.get("title") or os.path.basename(self.file_path),
+            "author": m.get("author", ""),
+            "page_count": len(doc),
+        }
+
+    def _calculate_checksum(self) -> str:
+        """计算文件 SHA-256：整块内存一次交给 OpenSSL（可用 SHA-NI 指令加速）"""
+        return self._memoized("sha256", lambda: hashlib.sha256(self._read_pdf()).hexdigest())
+
+    def _memoized(self, kind: str, compute):
+        """文件未变（大小、mtime 均相同）时直接返回上次的计算结果；计算失败不缓存"""
+        st = os.stat(self.file_path)
+        key = (kind, os.path.abspath(self.file_path), st.st_size, st.st_mtime_ns)
+        with _file_memo_lock:
+            if key in _file_memo:
+                _file_memo.move_to_end(key)
+                return _file_memo[key]
+        value = compute()
+        with _file_memo_lock:
+            _file_memo[key] = value
+            if len(_file_memo) > FILE_MEMO_SIZE:
+                _file_memo.popitem(last=False)
+        return value
+
+    # ------------------------------------------------------------------ #
+    # File access
+    # ------------------------------------------------------------------ #
+    def _read_pdf(self) -> bytes:
+        if self._pdf_bytes is None:
+            with open(self.file_path, "rb") as f:
+                self._pdf_bytes = f.read()
+        return self._pdf_bytes
+
+    def _document(self) -> fitz.Document:
+        """
+        解析期间共用同一个文档句柄：元数据、模式检测、文本抽取、渲染不再各自重新打开。
+        各阶段顺序使用，不会在多个线程中同时访问。
+        """
+        if self._doc is None:
+            self._doc = fitz.open(stream=self._read_pdf(), filetype="pdf")
+        return self._doc
+
+    def _release(self) -> None:
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+        self._pdf_bytes = None
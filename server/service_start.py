@@ -1,9 +1,12 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from server.config.config_loader import get_config
 from server.db.db_factory import DBFactory
 from server.task.task_manager import task_manager
 from server.task.scheduler import scheduler
+from server.utils.executors import shutdown_executors
+from server.utils.logger import stop_logging
 from server.rag.parser.parser_api import router as parser_router
 from server.task.task_api import router as task_router
 from server.chat.chat_api import router as chat_router
@@ -22,11 +25,17 @@ async def lifespan(app: FastAPI):
     # 扫描并注册本地 skills
     from server.skills.skill_registry import skill_registry
     skill_registry.initialize()
+    # 可选：预加载 OCR 模型（进程内单例，各次上传共用）
+    if get_config().get("parser", {}).get("preload_ocr", False):
+        from server.rag.parser.pdf_parser import preload_ocr_pipeline
+        await preload_ocr_pipeline()
     yield
     # ── 关闭 ──────────────────────────────────────────
     await scheduler.shutdown()
     await task_manager.shutdown()
     await DBFactory.close_all()
+    shutdown_executors()
+    stop_logging()
 
 
 app = FastAPI(title="Easy Paper Reader", lifespan=lifespan)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程内共享的具名执行器。
+阻塞调用按类型分配到各自大小固定的池中，不再挤占事件循环的默认线程池：
+  - io_pool    : 读盘、哈希、PyMuPDF 文本抽取等短阻塞调用
+  - render_pool: PDF 页面光栅化（纯 CPU，多进程绕开 GIL）
+  - model_pool : 模型加载与预热（单线程，长耗时，与 io_pool 隔离）
+OCR 推理的线程池由 PaddleOCRPipeline 自行持有。
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from server.utils.logger import logger
+
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", 4))
+
+_io_pool: Optional[ThreadPoolExecutor] = None
+_render_pool: Optional[ProcessPoolExecutor] = None
+_model_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="io")
+    return _io_pool
+
+
+def get_render_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        # spawn：子进程不继承父进程中的线程与连接状态
+        _render_pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _render_pool
+
+
+def get_model_pool() -> ThreadPoolExecutor:
+    """
+    模型加载可能持锁数十秒；放在单独的单线程池中排队，
+    并发上传等待加载时不占用 io_pool，其他任务的读盘与入库照常进行。
+    """
+    global _model_pool
+    if _model_pool is None:
+        _model_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-load")
+    return _model_pool
+
+
+def shutdown_executors() -> None:
+    """服务关闭时调用；取消排队中的任务，不等待正在执行的任务结束。"""
+    global _io_pool, _render_pool, _model_pool
+    for pool in (_io_pool, _render_pool, _model_pool):
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    _io_pool = _render_pool = _model_pool = None
+    logger.info("[executors] shutdown")
@@ -24,22 +24,37 @@
 import os
 import json
 import time
+import queue
+import atexit
 import logging
-from typing import Any, Dict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
 from contextvars import ContextVar
 from datetime import datetime
 
 # 全局 Trace ID 上下文变量，用于串联同一次请求的所有组件调用
 current_trace_id: ContextVar[str] = ContextVar("current_trace_id", default="SYSTEM")
 
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()   # 生产环境可设为 WARNING，DEBUG 仅排查时开启
+LOG_MAX_BYTES = 64 * 1024 * 1024                      # 单个日志文件上限，超出后轮转
+LOG_BACKUP_COUNT = 5
+
+# 后台写日志的监听线程；业务线程只把记录放入队列，不在事件循环上做磁盘 / 终端 IO
+_listener: Optional[QueueListener] = None
+
+
 def setup_elegant_logger(log_dir: str = "logs"):
-    """配置全局日志系统，双写：控制台(简略) + 本地JSONL文件(全量结构化)"""
+    """
+    配置全局日志系统，双写：控制台(简略) + 本地JSONL文件(全量结构化)
+    实际写出由 QueueListener 在后台线程完成，JSONL 文件按大小轮转
+    """
+    global _listener
     os.makedirs(log_dir, exist_ok=True)
     today = datetime.now().strftime("%Y-%m-%d")
     log_file = os.path.join(log_dir, f"trace_{today}.jsonl")
 
     logger = logging.getLogger("agent_backend")
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
     logger.propagate = False
 
     # 清除默认 handler，防止重复打印
@@ -70,7 +85,8 @@ def setup_elegant_logger(log_dir: str = "logs"):
             }
             return json.dumps(log_record, ensure_ascii=False)
 
-    fh = logging.FileHandler(log_file, encoding='utf-8')
+    fh = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                             encoding='utf-8')
     fh.setFormatter(JSONLFormatter())
 
     # 注入 Trace ID 的 Filter
@@ -80,11 +96,27 @@ def setup_elegant_logger(log_dir: str = "logs"):
             return True
 
     logger.addFilter(TraceFilter())
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+
+    # 3. 队列 Handler：记录入队即返回，由监听线程分发给上面两个 Handler
+    stop_logging()
+    log_queue: queue.Queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, ch, fh, respect_handler_level=True)
+    _listener.start()
     
     return logger
 
+
+def stop_logging() -> None:
+    """停止后台监听线程并写出队列中剩余的日志（服务关闭 / 进程退出时调用）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
 # 初始化全局 logger
 agent_logger = setup_elegant_logger()
 
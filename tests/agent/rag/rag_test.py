@@ -8,6 +8,7 @@ import json
 import numpy as np
 from server.agent.rag.rag_engine import RAGEngine
 from server.db.elasticsearch_function.es_paper import ESPaperStore
+from server.utils.async_runner import run
 
 def get_embedding():
     return np.random.rand(1024).tolist()
@@ -73,4 +74,4 @@ async def main():
     await es_paper_store.clear_all()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
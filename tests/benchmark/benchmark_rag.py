@@ -2,6 +2,8 @@
 
 import asyncio
 import random
+import shutil
+import tempfile
 import uuid
 import time
 import numpy as np
@@ -10,15 +12,19 @@ from typing import List
 # 调整 path 以便能导入 src
 import sys
 import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+from server.config.config_loader import get_config
+from server.db.chroma_function.chroma_store import ChromaVectorStore
 from server.db.db_factory import DBFactory
-from server.agent.rag.rag_engine import RAGEngine
+from server.rag.rag_engine import RAGEngine
 from server.utils.logger import logger
+from server.utils.async_runner import run
 
 # --- 模拟数据生成器 ---
 class MockDataGenerator:
-    def __init__(self):
+    def __init__(self, dims: int):
+        self.dims = dims
         # 准备一些具有特定关键词的主题，以便测试 BM25
         self.topics = [
             ("Quantum Computing", "qubit superposition entanglement"),
@@ -27,28 +33,28 @@ class MockDataGenerator:
             ("Renaissance Art", "da vinci michelangelo fresco perspective"),
             ("Database Systems", "acid transaction sql nosql indexing")
         ]
+        self.rng = np.random.default_rng()
 
     def generate_chunks(self, count=100) -> List[dict]:
+        # 模拟向量 (实际应调用 Embedding 模型，这里为了 Benchmark 速度使用随机)
+        # 一次生成 (count, dims) 的 float32 矩阵再按行取，避免逐条创建小数组；维度取自 embedding.dimensions
+        all_vecs = self.rng.standard_normal((count, self.dims), dtype=np.float32)
+        unique_ids = [uuid.uuid4().hex[:8] for _ in range(count)]
+
         chunks = []
-        for i in range(count):
+        for i, unique_id in enumerate(unique_ids):
             topic_name, keywords = random.choice(self.topics)
             # 生成一段包含关键词的随机文本
             # 为了测试，我们在文本中加入唯一的 UUID，作为“精准答案”的标记
-            unique_id = str(uuid.uuid4())[:8]
-            
             content = f"This is a paper about {topic_name}. Key concepts include {keywords}. " \
                       f"Specific detail identifier: {unique_id}. " \
                       f"Random padding data {random.randint(1000, 9999)}."
-            
-            # 模拟向量 (实际应调用 Embedding 模型，这里为了 Benchmark 速度使用随机)
-            # 维度必须与 ES mapping 一致 (768)
-            vector = np.random.rand(768).tolist()
-            
+
             chunks.append({
                 "paper_id": f"paper_{random.randint(1, 10)}",
                 "chunk_id": f"chunk_{i}_{unique_id}",
                 "content": content,
-                "vector": vector,
+                "vector": all_vecs[i].tolist(),
                 "title": f"Research on {topic_name}",
                 "unique_token": unique_id  # 用于验证
             })
@@ -57,95 +63,123 @@ class MockDataGenerator:
 async def run_benchmark():
     logger.info("Starting RAG Benchmark...")
     
-    # 1. 初始化
-    await DBFactory.init_all()
+    # 1. 初始化：使用临时目录下的独立 Chroma 库，不碰 data/chroma_db
+    #    （Chroma 会按首批写入锁定 collection 维度，删掉数据也不会解除）
+    persist_dir = tempfile.mkdtemp(prefix="bench_chroma_")
+    store = ChromaVectorStore(persist_dir=persist_dir)
+    await store.initialize()
+    DBFactory._chroma = store  # RAGEngine 通过 DBFactory.get_vector_store() 取库
     rag = RAGEngine()
-    es = DBFactory.get_es_paper_service()
-    generator = MockDataGenerator()
-    
-    # 2. 准备数据
-    DATA_SIZE = 50
-    logger.info(f"Generating {DATA_SIZE} mock chunks...")
-    dataset = generator.generate_chunks(DATA_SIZE)
+    dims = get_config().get("embedding", {}).get("dimensions", 1536)
+    generator = MockDataGenerator(dims)
     
-    # 3. 写入 ES (为了不污染真实库，实际测试建议用专门的 index，这里简化直接写入)
-    logger.info("Indexing data to Elasticsearch...")
-    tasks = []
-    for data in dataset:
-        task = es.add_paper_chunk(
-            paper_id=data['paper_id'],
-            chunk_id=data['chunk_id'],
-            content=data['content'],
-            vector=data['vector'],
-            title=data['title'],
-            metadata={"is_test": True} # 标记为测试数据
+    try:
+        # 2. 准备数据
+        DATA_SIZE = 50
+        logger.info(f"Generating {DATA_SIZE} mock chunks...")
+        dataset = generator.generate_chunks(DATA_SIZE)
+
+        # 3. 批量写入临时向量库
+        #    按论文分组，每篇一次批量写入，与 PDFParser 的入库路径一致
+        logger.info("Bulk indexing data...")
+        by_paper = {}
+        for data in dataset:
+            by_paper.setdefault(data['paper_id'], []).append({
+                "chunk_id": data['chunk_id'],
+                "content": data['content'],
+                "content_type": "text",
+                "vector": data['vector'],
+                "metadata": {"is_test": True},  # 标记为测试数据
+            })
+        payload_bytes = sum(len(d['content'].encode("utf-8")) + 4 * len(d['vector']) for d in dataset)
+        start = time.perf_counter()
+        for paper_id, chunks in by_paper.items():
+            await store.add_paper_chunks(paper_id, chunks)
+        ingest_s = time.perf_counter() - start
+        logger.info(
+            f"Ingest: {DATA_SIZE} docs in {ingest_s:.3f}s | "
+            f"{DATA_SIZE / ingest_s:.1f} docs/s | {payload_bytes / ingest_s / 1e6:.2f} MB/s"
         )
-        tasks.append(task)
-    await asyncio.gather(*tasks)
-    
-    # 等待 ES 刷新索引
-    logger.info("Waiting for ES refresh...")
-    await asyncio.sleep(2)
-    
-    # 4. 执行测试
-    # 测试策略：使用数据中的 unique_token 或关键词构建 Query
-    # 如果 vector 是随机的，纯 Vector Search 效果会很差，所以这里主要测试 Pipeline 的连通性和 BM25 的贡献
-    # *注意*：为了让随机 Vector 也能测出 Hybrid 的效果，我们在 Query 中使用完全匹配的关键词
-    
-    logger.info("Running queries...")
-    
-    top_k = 5
-    hits = 0
-    total_latency = 0
-    test_queries_count = 10 # 随机选 10 个进行测试
-    
-    test_samples = random.sample(dataset, test_queries_count)
-    
-    for sample in test_samples:
-        # 构造 Query：包含原文中的 unique identifier，确保 BM25 能强匹配
-        query = f"Tell me about {sample['unique_token']} and {sample['title']}"
-        
-        # 暂时 Hack：因为 Mock 数据的 Vector 是随机生成的，Query Vector 也是随机的
-        # 它们之间没有语义关系。为了让测试代码不报错且逻辑跑通，我们手动注入一个
-        # "作弊" 的行为：在真实场景下，Query Vector 和 Doc Vector 会在空间上接近。
-        # 这里的 Benchmark 主要是测代码逻辑连通性和延迟。
-        
-        start = time.time()
-        # 这里的 embedding_manager.get_embedding 也是返回随机向量
-        results = await rag.search(query, top_k=top_k, alpha=0.5)
-        latency = (time.time() - start) * 1000
-        total_latency += latency
-        
-        # 验证结果
-        # 检查检索结果的 chunk_id 列表中是否包含 sample 的 chunk_id
-        found = False
-        for res in results:
-            if res['chunk_id'] == sample['chunk_id']:
-                found = True
-                break
-        
-        if found:
-            hits += 1
-        
-        logger.info(f"Query: ...{sample['unique_token']}... | Latency: {latency:.2f}ms | Hit: {found}")
-
-    # 5. 输出报告
-    print("\n" + "="*30)
-    print(f"Benchmark Report (N={test_queries_count})")
-    print("="*30)
-    print(f"Total Chunks: {DATA_SIZE}")
-    print(f"Recall@{top_k}: {hits}/{test_queries_count} ({(hits/test_queries_count)*100:.1f}%)")
-    print(f"Avg Latency: {total_latency/test_queries_count:.2f} ms")
-    print("="*30 + "\n")
-
-    # 6. 清理数据 (可选，这里仅做演示，生产环境请谨慎)
-    # await es.delete_by_query(...) 
-    
-    await DBFactory.close_all()
+
+        # 4. 执行测试
+        # 测试策略：使用数据中的 unique_token 或关键词构建 Query
+        # 如果 vector 是随机的，纯 Vector Search 效果会很差，所以这里主要测试 Pipeline 的连通性和 BM25 的贡献
+        # *注意*：为了让随机 Vector 也能测出 Hybrid 的效果，我们在 Query 中使用完全匹配的关键词
+
+        logger.info("Running queries...")
+
+        top_k = 5
+        test_queries_count = 10 # 随机选 10 个进行测试
+        sweep_levels = (1, 4, 16, 64)
+        sweep_queries = 64      # 每个并发档位发出的查询数
+
+        test_samples = random.sample(dataset, test_queries_count)
+
+        def build_query(sample):
+            # 构造 Query：包含原文中的 unique identifier，确保 BM25 能强匹配
+            return f"Tell me about {sample['unique_token']} and {sample['title']}"
+
+        # Mock 数据的 Vector 是随机生成的，与 Query 向量没有语义关系，
+        # 这里的 Benchmark 主要是测代码逻辑连通性、延迟与吞吐。
+        async def timed_search(sample, sem: asyncio.Semaphore = None):
+            async def _search():
+                start = time.perf_counter()
+                retrieval = await rag.retrieve(build_query(sample), top_k=top_k)
+                return (time.perf_counter() - start) * 1000, retrieval.chunks
+            if sem is None:
+                latency, results = await _search()
+            else:
+                async with sem:
+                    latency, results = await _search()
+            # 检查检索结果的 chunk_id 列表中是否包含 sample 的 chunk_id
+            found = any(res['chunk_id'] == sample['chunk_id'] for res in results)
+            return latency, found
+
+        # 预热：一次批量请求把全部 Query 向量写入 EmbeddingManager 缓存，
+        # 计时只覆盖检索本身，不含 Embedding API 的网络开销
+        await rag.embedding.get_embeddings_batch([build_query(d) for d in dataset])
+        await rag.retrieve(build_query(test_samples[0]), top_k=top_k)
+
+        outcomes = await asyncio.gather(*[timed_search(sample) for sample in test_samples])
+        latencies = [lat for lat, _ in outcomes]
+        hits = sum(found for _, found in outcomes)
+        for sample, (latency, found) in zip(test_samples, outcomes):
+            logger.info(f"Query: ...{sample['unique_token']}... | Latency: {latency:.2f}ms | Hit: {found}")
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+
+        # 并发扫描：不同并发度下的 QPS 与尾延迟
+        sweep = []
+        for c in sweep_levels:
+            sem = asyncio.Semaphore(c)
+            samples = random.choices(dataset, k=sweep_queries)
+            start = time.perf_counter()
+            results = await asyncio.gather(*[timed_search(sample, sem) for sample in samples])
+            wall_s = time.perf_counter() - start
+            lats = [lat for lat, _ in results]
+            sweep.append((c, sweep_queries / wall_s, *np.percentile(lats, [50, 95, 99])))
+
+        # 5. 输出报告
+        print("\n" + "="*30)
+        print(f"Benchmark Report (N={test_queries_count})")
+        print("="*30)
+        print(f"Total Chunks: {DATA_SIZE}")
+        print(f"Ingest Throughput: {DATA_SIZE / ingest_s:.1f} docs/s")
+        print(f"Recall@{top_k}: {hits}/{test_queries_count} ({(hits/test_queries_count)*100:.1f}%)")
+        print(f"Latency p50/p95/p99: {p50:.2f} / {p95:.2f} / {p99:.2f} ms")
+        print("-"*30)
+        print("Concurrency |    QPS | p50 ms | p95 ms | p99 ms")
+        for c, qps, s50, s95, s99 in sweep:
+            print(f"{c:>11} | {qps:>6.1f} | {s50:>6.2f} | {s95:>6.2f} | {s99:>6.2f}")
+        print("="*30 + "\n")
+    finally:
+        # 6. 清理：关闭并删除临时库
+        await store.close()
+        DBFactory._chroma = None
+        shutil.rmtree(persist_dir, ignore_errors=True)
 
 if __name__ == "__main__":
     # Windows 下可能需要设置 loop policy
     if os.name == 'nt':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     
-    asyncio.run(run_benchmark())
\ No newline at end of file
+    run(run_benchmark())
\ No newline at end of file
@@ -3,6 +3,7 @@ sys.path.append("/data/code/Easy_Paper_Reader/")
 import time
 from server.db.elasticsearch_function.es_chat import ESChatStore
 from server.db.postgresql_function.postgresql_function import PostgresStore
+from server.utils.async_runner import run
 from langchain.messages import AIMessage, HumanMessage, SystemMessage
 import asyncio
 
@@ -21,4 +22,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -1,32 +1,47 @@
+import gc
 import os
+import re
 import json
 import sys
 sys.path.append("/data/code/Easy_Paper_Reader/")
 from server.db.elasticsearch_function.es_paper import ESPaperStore
+from server.utils.async_runner import run
 import asyncio
 import numpy as np
 
-def get_embedding():
-    return np.random.rand(1024).tolist()
+try:
+    import orjson  # 可选：比标准库 json 快数倍
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+_STRUCTURE_FILE_RE = re.compile(r"page_(\d+)_structure\.json$")
+
+def get_embeddings(count: int, dim: int = 1024) -> np.ndarray:
+    # 一次生成 (count, dim) 的 float32 矩阵，按行取用，避免逐条创建向量
+    return np.random.default_rng().standard_normal((count, dim), dtype=np.float32)
 
 def test_paper_function():
     test_paper_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ocr_test/output_images")
     result_list = []
 
+    # 把 "page_123_structure.json" 里的 123 取出来，按页码升序；scandir 直接给出完整路径
     pages = []
-    for p in os.listdir(test_paper_path):
-        if p.startswith("page_") and p.endswith("_structure.json"):
-            # 把 "page_123_structure.json" 里的 123 取出来
-            num = int(p.split("_")[1])
-            pages.append((num, p))
-
-    # 2. 按页码升序
-    pages.sort(key=lambda t: t[0])
-    for file_tuple in pages:
-        file_name = file_tuple[1]
-        with open(os.path.join(test_paper_path, file_name), 'r', encoding='utf-8') as file:
-            result_dict = json.loads(file.read())
-            result_list.append(result_dict["res"])
+    with os.scandir(test_paper_path) as entries:
+        for entry in entries:
+            m = _STRUCTURE_FILE_RE.match(entry.name)
+            if m:
+                pages.append((int(m.group(1)), entry.path))
+    pages.sort()
+    # 解析大量嵌套 dict 时暂停 GC，避免反复触发分代回收
+    gc.disable()
+    try:
+        for _, file_path in pages:
+            with open(file_path, 'rb') as file:
+                result_dict = _json_loads(file.read())
+                result_list.append(result_dict["res"])
+    finally:
+        gc.enable()
     return result_list
 
 async def main():
@@ -35,41 +50,44 @@ async def main():
     await es_paper_store.initialize()
     # result_list = test_paper_function()
 
-    # chunk_tasks = []
+    # embs = get_embeddings(sum(len(item['parsing_res_list']) for item in result_list))
+    # k = 0
+
+    # chunks = []
     # for i, item in enumerate(result_list):
     #     parsing_res = item['parsing_res_list']
-    #     for res in parsing_res:
-    #         chunk_id = f"{file_uuid}_p{i}_s{i}"
+    #     for j, res in enumerate(parsing_res):
+    #         # bulk 以 chunk_id 作为文档 _id，同页多个 block 需要各自唯一
+    #         chunk_id = f"{file_uuid}_p{i}_s{j}"
     #         chunk_text = res['block_content']
     #         c_type = res['block_label'] # text, table, figure...
     #         if c_type not in ['text', 'formula', 'figure', 'table', 'image', 'figure_title']:
     #             continue
     #         # 表格 、 图片会做裁剪，保存路径在 res['image_path']
     #         img_path_saved = res.get('image_path', '')
-    #         vector = get_embedding()
-            
+    #         vector = embs[k]  # float32 行直接传入，由 ESPaperStore 负责编码
+    #         k += 1
+
     #         # 构造 ES 存入数据
-    #         task = es_paper_store.add_paper_chunk(
-    #             paper_id=file_uuid,
-    #             chunk_id=chunk_id,
-    #             content=chunk_text,
-    #             content_type=c_type,
-    #             image_path= img_path_saved,
-    #             vector=vector,
-    #             page_num=i,
-    #             metadata={
+    #         chunks.append({
+    #             "chunk_id": chunk_id,
+    #             "content": chunk_text,
+    #             "content_type": c_type,
+    #             "image_path": img_path_saved,
+    #             "vector": vector,
+    #             "page_num": i,
+    #             "metadata": {
     #                 "original_bbox": res['block_bbox']
     #             }
-    #         )
-    #         chunk_tasks.append(task)
-    
-    # # 并发入库
-    # if chunk_tasks:
-    #     await asyncio.gather(*chunk_tasks)
-    
+    #         })
+
+    # # 一次 _bulk 入库，代替逐条 index 请求
+    # if chunks:
+    #     await es_paper_store.bulk_add_paper_chunks(file_uuid, chunks)
+
     # 查询是否入库成功
     await es_paper_store.search_paper_chunks(file_uuid)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -1,6 +1,7 @@
 import sys
 sys.path.append("/data/code/Easy_Paper_Reader/")
 from server.db.postgresql_function.postgresql_function import PostgresStore
+from server.utils.async_runner import run
 import asyncio
 import time
 
@@ -8,11 +9,17 @@ async def main():
     postgresdb = PostgresStore()
     await postgresdb.initialize()
     await postgresdb.create_user(user_uuid="user-uuid-5678", username="testuser")
-    await postgresdb.add_paper_metadata(paper_uuid="test-uuid-1234", title="Test Paper", uploader_uuid="user-uuid-5678", file_path="/path/to/test_paper.pdf")
-    await postgresdb.delete_paper_metadata(paper_uuid="test-uuid-1234")
+    # 种子数据一次批量写入，避免逐条 await 的往返开销
+    # 元组顺序与 COPY 的列顺序一致：(paper_uuid, title, uploader_uuid, file_path)
+    papers = [
+        (f"test-uuid-{i}", f"Test Paper {i}", "user-uuid-5678", f"/path/to/test_paper_{i}.pdf")
+        for i in range(100)
+    ]
+    await postgresdb.bulk_insert_papers(papers)
+    await postgresdb.delete_papers_metadata([p[0] for p in papers])
     await postgresdb.add_new_chat(user_uuid="user-uuid-5678", session_id="chat_1234", start_time=time.time())
     await postgresdb.delete_chat(user_uuid="user-uuid-5678", session_id="chat_1234")
     
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -1,47 +1,69 @@
 import os
-import os
-os.environ["FLAGS_use_mkldnn"] = "0"
 os.environ["FLAGS_use_cinn"] = "0"
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+import math
 import fitz  # PyMuPDF
-from typing import Dict, Any
-from server.model.ocr_model.paddle_ocr import PaddleOCRPipeline
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+import numpy as np
+from server.rag.parser.page_render import render_page
+from server.utils.async_runner import run
 
 output_folder = os.path.join(os.path.dirname(__file__), "output_images")
 os.makedirs(output_folder, exist_ok=True)
-image_paths = []
+page_images = []
+
+def _render_range(file_path, start, end, dpi, dump_dir: Optional[str] = None, grayscale=False) -> List[np.ndarray]:
+    """
+    子进程内渲染 [start, end) 页，直接返回像素数组交给 OCR，不经过磁盘编解码。
+    fitz.Document 不能跨进程共享，每个进程自行打开；dump_dir 非空时额外落盘 JPEG 便于调试。
+    """
+    images = []
+    with fitz.open(file_path) as pdf_document:
+        for page_num in range(start, end):
+            dump_path = os.path.join(dump_dir, f"page_{page_num + 1}.jpg") if dump_dir else None
+            # 灰度时返回 (h, w) 数组，OCR 侧推理前会转为三通道
+            images.append(render_page(pdf_document, page_num, dpi, grayscale, dump_path))
+    return images
+
 
-def extract_metadata(file_path, dpi=300) -> Dict[str, Any]:
+def extract_metadata(file_path, dpi=300, grayscale=False, dump=False) -> Dict[str, Any]:
     try:
         with fitz.open(file_path) as pdf_document:
-            for page_num in range(len(pdf_document)):
-                page = pdf_document.load_page(page_num)
-                
-                # 设置缩放比例
-                zoom = dpi / 72
-                matrix = fitz.Matrix(zoom, zoom)
-                
-                # 渲染为图像
-                pix = page.get_pixmap(matrix=matrix)
-                
-                # 保存图像
-                output_path = os.path.join(output_folder, f"page_{page_num + 1}.png")
-                pix.save(output_path)
-                image_paths.append(output_path)
+            page_count = len(pdf_document)
+        # 按 CPU 核数切分页区间，多进程并行渲染
+        workers = os.cpu_count() or 1
+        step = max(1, math.ceil(page_count / workers))
+        ranges = [(s, min(s + step, page_count)) for s in range(0, page_count, step)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges) or 1)) as pool:
+            dump_dir = output_folder if dump else None
+            futures = [pool.submit(_render_range, file_path, s, e, dpi, dump_dir, grayscale) for s, e in ranges]
+            for future in futures:
+                page_images.extend(future.result())
     except Exception as e:
         raise Exception(f"Failed to extract metadata from {file_path}: {str(e)}")
 
 
 async def main():
-    # pdf_path = "/DATA/llm_xuzhentao/Easy_Paper_Reader/Zero-Shot Chain-of-Thought Reasoning Guided by Evolutionary.pdf"
-    # extract_metadata(pdf_path)
-    parser = PaddleOCRPipeline()
-    # for index, img_path in enumerate(image_paths):
-    #     await parser.invoke_single_img(img_path, output_dir=output_folder, paper_index=index)
-    img_path = "/DATA/llm_xuzhentao/Easy_Paper_Reader/tests/ocr_test/output_images/page_2.png"
-    await parser.invoke_single_img(img_path, output_dir=output_folder, paper_index=0)
+    from server.model.ocr_model.paddle_ocr import PaddleOCRPipeline
+    pdf_path = "/DATA/llm_xuzhentao/Easy_Paper_Reader/Zero-Shot Chain-of-Thought Reasoning Guided by Evolutionary.pdf"
+    # --debug：渲染的整页图同时落盘到 output_images
+    extract_metadata(pdf_path, dump="--debug" in sys.argv)
+    import paddle
+    # 有 CUDA 设备时走 GPU（TensorRT FP16，初始化时已用空白图预热构建引擎）；
+    # 否则走 CPU，默认启用 MKLDNN，并换用 mobile 检测 / 识别模型
+    use_gpu = paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+    kwargs = {"use_gpu": use_gpu}
+    if not use_gpu:
+        kwargs.update(text_detection_model_name="PP-OCRv5_mobile_det",
+                      text_recognition_model_name="PP-OCRv5_mobile_rec")
+    parser = PaddleOCRPipeline({
+        "name": "paddle_ocr", "type": "ocr", "mode": "local", "provider": "paddleocr",
+        "use_gpu": use_gpu, "kwargs": kwargs,
+    })
+    # 所有页一次提交，按 batch_size 分批送入 predict
+    await parser.invoke_batch(page_images, output_dir=output_folder, batch_size=8)
 
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -1,13 +1,26 @@
 import os
 import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
-from server.parser.pdf_parser import PDFParser
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from server.db.db_factory import DBFactory
+from server.rag.parser.pdf_parser import PDFParser, preload_ocr_pipeline
+from server.utils.async_runner import run
+
+PDF_PATHS = [
+    "/DATA/llm_xuzhentao/Easy_Paper_Reader/Zero-Shot Chain-of-Thought Reasoning Guided by Evolutionary.pdf",
+]
 
 async def main():
-    pdf_path = "/DATA/llm_xuzhentao/Easy_Paper_Reader/Zero-Shot Chain-of-Thought Reasoning Guided by Evolutionary.pdf"
-    parser = PDFParser(pdf_path, uploader_uuid="test-uuid-1234")
-    parser.parse_and_save()
+    # OCR 模型是进程内单例，这里先加载一次；之后每个 PDFParser 只绑定文件，不会重复加载模型
+    await preload_ocr_pipeline()
+    # parse_and_save 通过 DBFactory 获取 SQLite / 向量库
+    await DBFactory.init_all()
+    try:
+        for pdf_path in PDF_PATHS:
+            parser = PDFParser(pdf_path, parse_mode="paddleocr")  # 数字版 PDF 在 auto 模式下会走 pymupdf，这里强制走 OCR
+            result = await parser.parse_and_save()
+            print(f"{pdf_path}: {result}")
+    finally:
+        await DBFactory.close_all()
 
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -23,6 +23,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
 from server.config.config_loader import get_config
+from server.utils.async_runner import run
 load_dotenv()
 
 PASS = "✅ PASS"
@@ -246,4 +247,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
@@ -4,8 +4,9 @@
 tests/test_db.py — 数据库层联调测试
 
 测试内容：
-  1. SQLiteStore  : 论文元数据 CRUD、会话/消息、任务状态、定时任务
-  2. ChromaVectorStore : 写入 chunk → 向量检索 → 删除
+  1. SQLiteStore  : 论文元数据 CRUD、会话/消息、任务状态、定时任务、校验和迁移与去重
+  2. ChromaVectorStore : 写入 chunk → 向量检索 → 删除 → 批量写入
+  3. ESPaperStore : _bulk 批量写入（未安装或无法连接 Elasticsearch 时跳过）
 
 运行方式（在项目根目录）：
   python tests/test_db.py
@@ -20,6 +21,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from server.db.sqlite_function.sqlite_store import SQLiteStore
 from server.db.chroma_function.chroma_store import ChromaVectorStore
+from server.utils.async_runner import run
 
 # 使用临时路径，避免污染真实数据
 _TMP_DB   = "./data/test_paper_reader.db"
@@ -27,6 +29,7 @@ _TMP_CHROMA = "./data/test_chroma_db"
 
 PASS = "✅ PASS"
 FAIL = "❌ FAIL"
+SKIP = "⏭  SKIP"
 
 
 def p(label: str, ok: bool):
@@ -111,6 +114,48 @@ async def test_sqlite():
     print("  (temp db cleaned up)")
 
 
+async def test_paper_checksum():
+    print("\n=== SQLiteStore checksum ===")
+    import aiosqlite
+    if os.path.exists(_TMP_DB):
+        os.remove(_TMP_DB)
+    # 旧版本的表结构：没有 checksum 列
+    async with aiosqlite.connect(_TMP_DB) as conn:
+        await conn.execute("""
+            CREATE TABLE paper_metadata (
+                paper_uuid TEXT PRIMARY KEY, title TEXT NOT NULL, authors TEXT,
+                publish_year INTEGER, abstract TEXT, doi TEXT, arxiv_id TEXT, file_path TEXT,
+                is_processed INTEGER NOT NULL DEFAULT 0, parse_mode TEXT DEFAULT 'pymupdf',
+                created_at TEXT NOT NULL
+            )""")
+        await conn.commit()
+
+    store = SQLiteStore(db_path=_TMP_DB)
+    await store.initialize()
+    try:
+        async with store._conn.execute("PRAGMA table_info(paper_metadata)") as cur:
+            columns = {row[1] async for row in cur}
+        p("migrate 补充 checksum 列", "checksum" in columns)
+        async with store._conn.execute("PRAGMA index_list(paper_metadata)") as cur:
+            indexes = {row[1] async for row in cur}
+        p("migrate 创建 idx_paper_checksum", "idx_paper_checksum" in indexes)
+
+        checksum = uuid.uuid4().hex
+        pid = "paper_" + uuid.uuid4().hex[:8]
+        await store.add_paper_metadata(pid, "Checksum Paper", "/tmp/test.pdf", checksum=checksum)
+        p("未处理完成的论文不参与去重", await store.get_paper_by_checksum(checksum) is None)
+
+        await store.mark_paper_processed(pid)
+        found = await store.get_paper_by_checksum(checksum)
+        p("get_paper_by_checksum 命中", found is not None and found["paper_uuid"] == pid)
+        p("get_paper_by_checksum 未知校验和", await store.get_paper_by_checksum("0" * 64) is None)
+    finally:
+        await store.close()
+        if os.path.exists(_TMP_DB):
+            os.remove(_TMP_DB)
+    print("  (temp db cleaned up)")
+
+
 async def test_chroma():
     print("\n=== ChromaVectorStore ===")
     store = ChromaVectorStore(persist_dir=_TMP_CHROMA)
@@ -149,6 +194,22 @@ async def test_chroma():
     count2 = await store.count_chunks_by_paper(pid)
     p("delete_paper_chunks", count2 == 0)
 
+    # 批量写入：并发提交的批次由写入合并器合成一次 upsert，metadata 同样展开为 extra_*
+    batches = [[{
+        "chunk_id": f"{pid}_bulk_{b}_{i}",
+        "content": f"Bulk chunk {b}-{i} about attention mechanism.",
+        "content_type": "text",
+        "vector": fake_vector,
+        "page_num": i + 1,
+        "metadata": {"is_test": True},
+    } for i in range(3)] for b in range(2)]
+    await asyncio.gather(*[store.add_paper_chunks(pid, batch) for batch in batches])
+    count3 = await store.count_chunks_by_paper(pid)
+    p("add_paper_chunks 并发批量写入", count3 == 6)
+    bulk_chunks = await store.get_paper_chunks(pid)
+    p("add_paper_chunks 保留 extra_ metadata", all(c.get("extra_is_test") == "True" for c in bulk_chunks))
+    await store.delete_paper_chunks(pid)
+
     await store.close()
     import shutil
     if os.path.exists(_TMP_CHROMA):
@@ -156,11 +217,46 @@ async def test_chroma():
     print("  (temp chroma cleaned up)")
 
 
+async def test_es_bulk():
+    print("\n=== ESPaperStore bulk ===")
+    try:
+        from server.db.elasticsearch_function.es_paper import ESPaperStore
+    except ImportError:
+        print(f"  {SKIP}  未安装 elasticsearch，跳过此测试")
+        return
+    store = ESPaperStore()
+    try:
+        if not await store.es_connect.ping():
+            print(f"  {SKIP}  Elasticsearch 不可用，跳过此测试")
+            return
+        await store.initialize()
+
+        pid = "paper_" + uuid.uuid4().hex[:8]
+        dims = store.paper_body["mappings"]["properties"]["vector"]["dims"]
+        chunks = ({
+            "chunk_id": f"{pid}_chunk_{i}",
+            "content": f"This is chunk {i} about attention mechanism in transformer.",
+            "content_type": "text",
+            "vector": [0.1] * dims,
+            "page_num": i + 1,
+        } for i in range(3))
+        success = await store.bulk_add_paper_chunks(pid, chunks)
+        p("bulk_add_paper_chunks 写入条数", success == 3)
+
+        await store.es_connect.indices.refresh(index=store.paper_index)
+        p("count_chunks_by_file", await store.count_chunks_by_file(pid) == 3)
+        await store.clear_paper_chunks(pid)
+    finally:
+        await store.close()
+
+
 async def main():
     await test_sqlite()
+    await test_paper_checksum()
     await test_chroma()
+    await test_es_bulk()
     print("\n=== DB tests done ===\n")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
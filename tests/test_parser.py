@@ -25,6 +25,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
 from server.config.config_loader import get_config
+from server.utils.async_runner import run
 load_dotenv()
 
 PASS = "✅ PASS"
@@ -58,7 +59,7 @@ def _find_test_pdf() -> str:
 async def test_metadata_extraction(pdf_path: str):
     print("\n=== 元数据提取 ===")
     from server.rag.parser.pdf_parser import PDFParser
-    parser = PDFParser(pdf_path, uploader_uuid="test_user")
+    parser = PDFParser(pdf_path)
     meta = parser._extract_metadata()
     p("title 非空", bool(meta.get("title")))
     p("page_count > 0", meta.get("page_count", 0) > 0)
@@ -70,7 +71,7 @@ async def test_metadata_extraction(pdf_path: str):
 async def test_pymupdf_parse(pdf_path: str):
     print("\n=== PyMuPDF 解析（不调用 API）===")
     from server.rag.parser.pdf_parser import PDFParser
-    parser = PDFParser(pdf_path, uploader_uuid="test_user", parse_mode="pymupdf")
+    parser = PDFParser(pdf_path, parse_mode="pymupdf")
     chunks = await parser._parse_with_pymupdf()
     p("解析出 chunk > 0", len(chunks) > 0)
     p("chunk 包含 content 字段", all("content" in c for c in chunks))
@@ -82,7 +83,7 @@ async def test_pymupdf_parse(pdf_path: str):
 async def test_paddleocr_parse(pdf_path: str):
     print("\n=== PaddleOCR 解析（不调用 API）===")
     from server.rag.parser.pdf_parser import PDFParser
-    parser = PDFParser(pdf_path, uploader_uuid="test_user", parse_mode="paddleocr")
+    parser = PDFParser(pdf_path, parse_mode="paddleocr")
     chunks = await parser._parse_with_paddleocr()
     p("解析出 chunk > 0", len(chunks) > 0)
     p("chunk 包含 content 字段", all("content" in c for c in chunks))
@@ -103,14 +104,18 @@ async def test_full_pipeline(pdf_path: str):
     task_manager.initialize()
 
     from server.rag.parser.pdf_parser import PDFParser
-    parser = PDFParser(pdf_path, uploader_uuid="test_user", parse_mode="pymupdf")
+    parser = PDFParser(pdf_path, parse_mode="pymupdf")
     try:
         result = await parser.parse_and_save()
-        p("parse_and_save 返回 success", result.get("status") == "success")
+        status = result.get("status")
+        # 同一 PDF 按校验和去重：重复运行时返回 already_processed 和已有的 paper_uuid
+        p("parse_and_save 返回 success / already_processed", status in ("success", "already_processed"))
         p("paper_uuid 非空", bool(result.get("paper_uuid")))
-        p("chunks > 0", result.get("chunks", 0) > 0)
+        if status == "success":
+            p("chunks > 0", result.get("chunks", 0) > 0)
+        print(f"  status    : {status}")
         print(f"  paper_uuid: {result.get('paper_uuid')}")
-        print(f"  入库 chunks: {result.get('chunks')}")
+        print(f"  入库 chunks: {result.get('chunks', '-')}")
 
         # 验证元数据已写入 SQLite
         sqlite = DBFactory.get_sqlite()
@@ -144,4 +149,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
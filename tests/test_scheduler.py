@@ -22,6 +22,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
 from server.config.config_loader import get_config
+from server.utils.async_runner import run
 load_dotenv()
 
 PASS = "✅ PASS"
@@ -281,4 +282,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())